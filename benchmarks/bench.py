@@ -0,0 +1,295 @@
+"""Benchmarks for the hot paths of firefly_test.
+
+Run all benchmarks and save the results:
+
+    python benchmarks/bench.py --json before.json
+
+Then upgrade firefly_test, run them again, and compare:
+
+    python benchmarks/bench.py --json after.json --compare before.json
+
+App benchmarks need an installed app and run only if its ID is given
+with --app (for example, --app sys.input-test).
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import timeit
+from dataclasses import dataclass
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable
+
+from firefly_test import HEIGHT, WIDTH, App, Color, Frame, Pattern
+from firefly_test._color import PAT_TO_COLOR
+from firefly_test._frame import _HAS_NUMPY
+
+
+Setup = Callable[['Context'], Callable[[], object]]
+
+BENCHMARKS: dict[str, Setup] = {}
+APP_BENCHMARKS: dict[str, Setup] = {}
+
+
+@dataclass
+class Context:
+    """Shared inputs for benchmarks.
+    """
+
+    tmp: Path
+    """A temporary directory for files written and read by benchmarks.
+    """
+
+    app_id: str | None
+    """The ID of the installed app to use in App benchmarks.
+    """
+
+    frame: Frame
+    """A typical frame: a few colors from the default palette.
+    """
+
+    raw: bytes
+    """The raw RGB565 bytes of the frame, as returned by the runtime.
+    """
+
+
+def benchmark(setup: Setup) -> Setup:
+    """Register a benchmark.
+
+    The function prepares the inputs and returns the function to be timed.
+    """
+    BENCHMARKS[setup.__name__.removeprefix('bench_')] = setup
+    return setup
+
+
+def app_benchmark(setup: Setup) -> Setup:
+    """Register a benchmark that requires an installed app.
+    """
+    APP_BENCHMARKS[setup.__name__.removeprefix('bench_')] = setup
+    return setup
+
+
+def make_frame(seed: int = 13) -> Frame:
+    """Generate a frame that looks like a typical game screen.
+
+    The background is filled with one color and there are a few
+    rectangles of other colors from the default palette.
+    """
+    rng = random.Random(seed)
+    palette = list(PAT_TO_COLOR.values())
+    buf = [palette[0]] * (WIDTH * HEIGHT)
+    for _ in range(40):
+        color = rng.choice(palette)
+        x, y = rng.randrange(WIDTH - 20), rng.randrange(HEIGHT - 20)
+        width, height = rng.randint(1, 20), rng.randint(1, 20)
+        for line in range(y, y + height):
+            start = line * WIDTH + x
+            buf[start:start + width] = [color] * width
+    return Frame._from_rgb16(buf, width=WIDTH)
+
+
+@benchmark
+def bench_frame_from_rgb16(ctx: Context) -> Callable[[], object]:
+    return lambda: Frame._from_rgb16(ctx.raw, width=WIDTH)
+
+
+@benchmark
+def bench_frame_from_rgb24(ctx: Context) -> Callable[[], object]:
+    rgb24 = ctx.frame.to_rgb24()
+    return lambda: Frame.from_rgb24(rgb24, width=WIDTH)
+
+
+@benchmark
+def bench_assert_match_pattern(ctx: Context) -> Callable[[], object]:
+    frame = ctx.frame
+    pattern = '\n'.join(frame._format_line(y) for y in range(frame.height))
+    Pattern.compile(pattern)
+    return lambda: frame.assert_match(pattern)
+
+
+@benchmark
+def bench_assert_match_frame(ctx: Context) -> Callable[[], object]:
+    # A fresh frame each time, so that the cached digest doesn't help.
+    expected = make_frame()
+    return lambda: Frame._from_rgb16(ctx.raw, width=WIDTH).assert_match(expected)
+
+
+@benchmark
+def bench_assert_match_snapshot(ctx: Context) -> Callable[[], object]:
+    path = ctx.tmp / 'snapshot'
+    ctx.frame.write(path)
+    return lambda: ctx.frame.assert_match(path)
+
+
+@benchmark
+def bench_frame_write_palette(ctx: Context) -> Callable[[], object]:
+    return lambda: ctx.frame.write(io.BytesIO(), encoding='palette')
+
+
+@benchmark
+def bench_frame_write_zlib(ctx: Context) -> Callable[[], object]:
+    return lambda: ctx.frame.write(io.BytesIO(), encoding='zlib')
+
+
+@benchmark
+def bench_frame_read_palette(ctx: Context) -> Callable[[], object]:
+    path = ctx.tmp / 'palette'
+    ctx.frame.write(path, encoding='palette')
+    return lambda: Frame.read(path)
+
+
+@benchmark
+def bench_frame_read_raw(ctx: Context) -> Callable[[], object]:
+    path = ctx.tmp / 'raw'
+    ctx.frame.write(path, encoding='raw')
+    return lambda: Frame.read(path)
+
+
+@benchmark
+def bench_to_png(ctx: Context) -> Callable[[], object]:
+    return lambda: ctx.frame.to_png(io.BytesIO())
+
+
+@benchmark
+def bench_to_counter(ctx: Context) -> Callable[[], object]:
+    return ctx.frame.to_counter
+
+
+@benchmark
+def bench_get_sub(ctx: Context) -> Callable[[], object]:
+    return lambda: ctx.frame.get_sub(x=40, y=30, width=100, height=80)
+
+
+@benchmark
+def bench_color_from_rgb24(ctx: Context) -> Callable[[], object]:
+    values = [random.Random(13).randrange(0x1000000) for _ in range(1000)]
+
+    def run() -> None:
+        for value in values:
+            Color.from_rgb24(value)
+    return run
+
+
+@benchmark
+def bench_color_properties(ctx: Context) -> Callable[[], object]:
+    colors = list(ctx.frame.to_set())
+
+    def run() -> None:
+        for color in colors:
+            _ = (color.r, color.g, color.b, color.rgb, color.hls, color.hsv)
+    return run
+
+
+@app_benchmark
+def bench_app_update(ctx: Context) -> Callable[[], object]:
+    assert ctx.app_id is not None
+    app = App(ctx.app_id)
+    app.start()
+    return app.update
+
+
+@app_benchmark
+def bench_app_update_and_frame(ctx: Context) -> Callable[[], object]:
+    assert ctx.app_id is not None
+    app = App(ctx.app_id)
+    app.start()
+
+    def run() -> None:
+        app.update()
+        _ = app.frame
+    return run
+
+
+@app_benchmark
+def bench_app_run_100(ctx: Context) -> Callable[[], object]:
+    assert ctx.app_id is not None
+    app = App(ctx.app_id)
+    app.start()
+    return lambda: app.run(100, capture=0)
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict[str, Any]:
+    """Time the function and return the time per call, in seconds.
+    """
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    times = [t / loops for t in timer.repeat(repeat=repeat, number=loops)]
+    return {
+        'best': min(times),
+        'median': statistics.median(times),
+        'loops': loops,
+    }
+
+
+def get_meta() -> dict[str, Any]:
+    try:
+        package_version = version('firefly_test')
+    except PackageNotFoundError:
+        package_version = None
+    return {
+        'firefly_test': package_version,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'numpy': _HAS_NUMPY,
+    }
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f} {unit}'
+    return f'{seconds / 1e-9:.0f} ns'
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--json', type=Path, help='save the results into the file')
+    parser.add_argument('--compare', type=Path, help='compare with saved results')
+    parser.add_argument('--app', help='the ID of an installed app to benchmark')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('-k', dest='filter', help='run only matching benchmarks')
+    args = parser.parse_args(argv)
+
+    benchmarks = dict(BENCHMARKS)
+    if args.app:
+        benchmarks.update(APP_BENCHMARKS)
+    if args.filter:
+        benchmarks = {k: v for k, v in benchmarks.items() if args.filter in k}
+    old: dict[str, Any] = {}
+    if args.compare:
+        old = json.loads(args.compare.read_text())['results']
+
+    results: dict[str, dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        frame = make_frame()
+        ctx = Context(
+            tmp=Path(tmp),
+            app_id=args.app,
+            frame=frame,
+            raw=frame._buf.tobytes(),
+        )
+        for name, setup in benchmarks.items():
+            result = measure(setup(ctx), repeat=args.repeat)
+            results[name] = result
+            line = f'{name:<28} {format_time(result["median"]):>10}'
+            if name in old:
+                ratio = result['median'] / old[name]['median']
+                line += f'  {ratio:.2f}x'
+            print(line, flush=True)
+
+    if args.json:
+        report = {'meta': get_meta(), 'results': results}
+        args.json.write_text(json.dumps(report, indent=2) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,18 @@
 """Framework for testing Firefly Zero apps.
 """
 from ._app import App
+from ._checkpoint import Checkpoint
 from ._cli import CLI
 from ._color import Color
+from ._condition import Condition
+from ._diff import Diff
+from ._fork import ForkError, fork_map
 from ._frame import HEIGHT, WIDTH, Frame
+from ._fuzz import Finding, fuzz
 from ._input import Input, Pad
+from ._pattern import Pattern
+from ._stats import FrameStats, Stats
+from ._timeline import InputTimeline
 
 
 __all__ = [
@@ -12,8 +20,19 @@ __all__ = [
     'HEIGHT',
     'WIDTH',
     'App',
+    'Checkpoint',
     'Color',
+    'Condition',
+    'Diff',
+    'Finding',
+    'ForkError',
     'Frame',
+    'FrameStats',
     'Input',
+    'InputTimeline',
     'Pad',
+    'Pattern',
+    'Stats',
+    'fork_map',
+    'fuzz',
 ]
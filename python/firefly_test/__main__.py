@@ -0,0 +1,50 @@
+"""Command-line tools: python -m firefly_test --help
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from ._fuzz import fuzz
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m firefly_test')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fuzz_parser = commands.add_parser(
+        'fuzz',
+        help='run the app with random inputs, looking for crashes',
+    )
+    fuzz_parser.add_argument('id', help='full app ID, like "lux.snek"')
+    fuzz_parser.add_argument('--vfs', type=Path, help='path to the VFS root')
+    fuzz_parser.add_argument('--runs', type=int, default=1000)
+    fuzz_parser.add_argument('--length', type=int, default=600)
+    fuzz_parser.add_argument('--every', type=int, default=10)
+    fuzz_parser.add_argument('--workers', type=int)
+    fuzz_parser.add_argument('--timeout', type=float, default=10.0)
+    fuzz_parser.add_argument('--seed', type=int)
+    fuzz_parser.add_argument('--out', type=Path, default=Path('fuzz-findings'))
+    fuzz_parser.add_argument('--allow-exit', action='store_true')
+
+    args = parser.parse_args(argv)
+    findings = fuzz(
+        args.id,
+        args.vfs,
+        runs=args.runs,
+        length=args.length,
+        every=args.every,
+        workers=args.workers,
+        timeout=args.timeout,
+        seed=args.seed,
+        out_dir=args.out,
+        allow_exit=args.allow_exit,
+    )
+    for finding in findings:
+        print(f'{finding.kind}: {finding.message} -> {finding.path}')
+    return 1 if findings else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
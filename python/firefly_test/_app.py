@@ -1,12 +1,33 @@
 from __future__ import annotations
 
+import asyncio
+from array import array
 from pathlib import Path
-from typing import Iterator
+from typing import (
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Mapping,
+    Sequence,
+    TypeVar,
+    Union,
+)
 
 import firefly_test._rust as rust
 
-from ._frame import Frame
-from ._input import Input, Pad
+from ._checkpoint import Checkpoint
+from ._color import Color
+from ._condition import Condition
+from ._frame import HEIGHT, WIDTH, Frame
+from ._input import Input, _input_state
+from ._stats import FrameStats, Stats
+from ._timeline import InputTimeline
+
+
+T = TypeVar('T')
+Inputs = Union[Mapping[int, Input], Sequence[Union[Input, None]], InputTimeline]
 
 
 class ExitedError(Exception):
@@ -18,6 +39,10 @@ class ExitedError(Exception):
 class App:
     """A runtime for a single Firefly Zero app.
 
+    All input changes the app receives are kept in memory for App.timeline
+    and App.checkpoint. So the memory usage of a long-running App grows
+    with the number of input changes (but not the number of updates).
+
     Args:
         id: the full ID of the app. For example, "lux.snek".
         vfs_path: optional Path to the virtual FS root.
@@ -27,35 +52,56 @@ class App:
         '_app_id',
         '_author_id',
         '_exited',
+        '_frame',
+        '_inputs',
+        '_lock',
         '_runner',
         '_started',
+        '_updates',
         '_vfs_path',
     )
     _runner: rust.Runner
     _author_id: str
     _app_id: str
-    _vfs_path: Path
+    _vfs_path: Path | None
     _started: bool
     _exited: bool
+    _updates: int
+    _inputs: list[tuple[int, int, int, int]]
+    _frame: tuple[int, int, Frame] | None
+    _lock: asyncio.Lock
 
     def __init__(
         self,
         id: str | tuple[str, str],
         vfs_path: Path | None = None,
     ) -> None:
-        if isinstance(id, str):
-            left, sep, right = id.partition('.')
-            assert sep == '.'
-            id = (left, right)
-        self._author_id, self._app_id = id
-        assert 0 < len(self._author_id) <= 16
-        assert 0 < len(self._app_id) <= 16
+        self._author_id, self._app_id = _parse_id(id)
+        self._vfs_path = vfs_path
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint: Checkpoint) -> App:
+        """Create a new App from a checkpoint made by App.checkpoint.
+        """
+        id = (checkpoint._author_id, checkpoint._app_id)
+        app = cls(id, checkpoint._vfs_path)
+        app.restore(checkpoint)
+        return app
+
+    def _reset(self) -> None:
+        """Create a fresh runtime for the app.
+        """
         self._started = False
         self._exited = False
+        self._updates = 0
+        self._inputs = []
+        self._frame = None
         self._runner = rust.Runner(
             author_id=self._author_id,
             app_id=self._app_id,
-            vfs_path=str(vfs_path.resolve()) if vfs_path else '',
+            vfs_path=_vfs_path_str(self._vfs_path),
         )
 
     def start(self) -> None:
@@ -76,32 +122,338 @@ class App:
         Raises:
             ExitedError:
         """
-        if not self._started:
-            raise RuntimeError('app must be started before it can be updated')
-        if self._exited:
-            raise RuntimeError('trying to update exited app')
+        self._check_can_update()
         if input is not None:
-            if isinstance(input, Pad):
-                self._runner.set_input(x=input._x, y=input._y, b=0)
-            else:
-                self._runner.set_input(
-                    x=input._pad._x,
-                    y=input._pad._y,
-                    b=input._buttons,
-                )
+            x, y, b = _input_state(input)
+            self._runner.set_input(x=x, y=y, b=b)
+            self._inputs.append((self._updates, x, y, b))
         exit = self._runner.update()
+        self._updates += 1
+        if exit:
+            self._exited = True
+            raise ExitedError
+
+    def run(
+        self,
+        n: int,
+        *,
+        inputs: Inputs | None = None,
+        capture: int | Literal['last'] = 'last',
+        render: bool = True,
+    ) -> list[Frame]:
+        """Run n update cycles in a single call into the runtime.
+
+        It's much faster than calling App.update in a loop
+        because frames are copied out of the runtime only when requested.
+
+        Args:
+            n: how many update cycles to run.
+            inputs: the input timeline. Either a mapping of the update index
+                (starting from 0) to the input that should be set before
+                that update, a sequence of inputs for each update
+                (None to keep the old input), or an InputTimeline.
+                Each input stays active until overwritten,
+                the same as for App.update.
+            capture: which frames to return. If "last" (default), only the
+                frame after the last update. If an integer k, every k-th frame.
+                If 0, no frames.
+            render: if False, the app renders only the captured frames
+                and the frame after the last update. For all other updates,
+                only the update logic runs. See App.advance.
+
+        Raises:
+            ExitedError: if the app exits before all updates are done.
+        """
+        self._check_can_update()
+        items: Iterable[tuple[int, Input | None]]
+        if isinstance(inputs, InputTimeline):
+            timeline = [change for change in inputs._changes() if change[0] < n]
+        else:
+            if inputs is None:
+                items = ()
+            elif isinstance(inputs, Mapping):
+                items = sorted(inputs.items(), key=lambda item: item[0])
+            else:
+                items = enumerate(inputs)
+            timeline = [
+                (i, *_input_state(input))
+                for i, input in items
+                if input is not None and i < n
+            ]
+        if capture == 'last':
+            every, last = 0, True
+        else:
+            assert capture >= 0
+            every, last = capture, False
+        frames, exit = self._runner.run(n, timeline, every, last, render)
+        offset = self._updates
+        self._inputs.extend((offset + i, x, y, b) for i, x, y, b in timeline)
+        self._updates += n
         if exit:
             self._exited = True
             raise ExitedError
+        result = [Frame._from_rgb16(buf, width=WIDTH) for _, buf in frames]
+        if result and frames[-1][0] == n - 1:
+            # The frame after the last update is what App.frame would return.
+            runner = self._runner
+            self._frame = (runner.generation, runner.tick, result[-1])
+        return result
+
+    def advance(
+        self,
+        n: int,
+        *,
+        inputs: Inputs | None = None,
+        render: bool = False,
+    ) -> None:
+        """Fast-forward the app by n update cycles.
+
+        By default, the app doesn't render the frames on the way,
+        which makes it much faster to get through intros and menus.
+        Only the frame after the last update is rendered,
+        so App.frame is up-to-date when it's done.
+
+        Accepts the same inputs as App.run.
+
+        Raises:
+            ExitedError: if the app exits before all updates are done.
+        """
+        self.run(n, inputs=inputs, capture=0, render=render)
+
+    def wait_until(
+        self,
+        condition: Condition,
+        *,
+        max_frames: int = 600,
+        input: Input | None = None,
+    ) -> int:
+        """Run update cycles until the displayed frame satisfies the condition.
+
+        The condition is checked in the runtime after each update,
+        so it's much faster than calling App.update and checking
+        App.frame in a loop. At least one update is always run.
+
+        Args:
+            condition: what to wait for. See Condition.
+            max_frames: how many updates to run at most.
+            input: if given, the input to set before the first update.
+
+        Returns:
+            How many updates were run until the condition was satisfied.
+
+        Raises:
+            TimeoutError: if the condition is not satisfied in max_frames updates.
+            ExitedError: if the app exits before the condition is satisfied.
+        """
+        self._check_can_update()
+        assert max_frames > 0
+        checks = condition._resolve(lambda: self.frame._buf)
+        if input is not None:
+            x, y, b = _input_state(input)
+            self._runner.set_input(x=x, y=y, b=b)
+            self._inputs.append((self._updates, x, y, b))
+        raw = [check._raw() for check in checks]
+        n, matched, exit = self._runner.wait_until(raw, max_frames)
+        self._updates += n
+        if exit:
+            # The app may exit on the same update that satisfies the condition.
+            self._exited = True
+        if matched:
+            return n
+        if exit:
+            raise ExitedError
+        raise TimeoutError(f'the condition is not satisfied in {n} frames')
+
+    def replay(
+        self,
+        timeline: InputTimeline,
+        *,
+        capture: int | Literal['last'] = 'last',
+        render: bool = True,
+    ) -> list[Frame]:
+        """Run all updates from the timeline in a single call into the runtime.
+
+        The same as App.run with the timeline length as the number of updates.
+        Set render to False to replay long recordings even faster.
+
+        Raises:
+            ExitedError: if the app exits before all updates are done.
+        """
+        return self.run(len(timeline), inputs=timeline, capture=capture, render=render)
+
+    @property
+    def timeline(self) -> InputTimeline:
+        """All inputs the app has received since it was started.
+
+        Can be saved and later replayed with App.replay.
+        """
+        return InputTimeline._from_changes(self._inputs, self._updates)
+
+    def checkpoint(self) -> Checkpoint:
+        """Make a replay checkpoint of the app.
+
+        The checkpoint can be restored later with App.restore
+        or used to create a new App with App.from_checkpoint.
+        Restoring replays all updates recorded in the checkpoint,
+        see Checkpoint for the costs. To explore many branches
+        from the same point, fork_map is much faster.
+        """
+        if not self._started:
+            raise RuntimeError('app must be started before making a checkpoint')
+        if self._exited:
+            raise RuntimeError('trying to make a checkpoint of exited app')
+        return Checkpoint(
+            author_id=self._author_id,
+            app_id=self._app_id,
+            vfs_path=self._vfs_path,
+            inputs=tuple(self._inputs),
+            updates=self._updates,
+            frame=self.frame,
+        )
+
+    def restore(self, checkpoint: Checkpoint) -> None:
+        """Bring the app to the point recorded by App.checkpoint.
+
+        The app runtime is replaced by a fresh one which is then started
+        and fast-forwarded through all recorded updates in a single
+        native call. All updates are rendered, the same as with
+        App.update, in case the app changes its state when rendering.
+
+        Raises:
+            ValueError: if the checkpoint belongs to another app or VFS.
+            RuntimeError: if the restored frame differs from the saved one.
+        """
+        cp = checkpoint
+        if (cp._author_id, cp._app_id) != (self._author_id, self._app_id):
+            raise ValueError(f'the checkpoint belongs to another app: {cp.id}')
+        if _vfs_path_str(cp._vfs_path) != _vfs_path_str(self._vfs_path):
+            raise ValueError('the checkpoint belongs to another VFS')
+        self._reset()
+        self.start()
+        if cp._updates:
+            _, exit = self._runner.run(cp._updates, list(cp._inputs), 0, False, True)
+            if exit:
+                self._exited = True
+                raise RuntimeError('the app exited while restoring the checkpoint')
+        self._inputs = list(cp._inputs)
+        self._updates = cp._updates
+        if self.frame != cp._frame:
+            raise RuntimeError('the restored frame differs from the saved one')
+
+    @property
+    def stats(self) -> Stats:
+        """Performance counters of the app runtime.
+
+        Shows how much time the app spends in update cycles, how much of it
+        is spent drawing on the mock screen, and how much time it takes
+        to copy frames out of the runtime.
+        Useful for finding which apps and tests are CPU-bound.
+        """
+        updates, update, max_update, flush, copy = self._runner.stats()
+        return Stats(
+            updates=updates,
+            update_time=update,
+            max_update_time=max_update,
+            flush_time=flush,
+            copy_time=copy,
+        )
+
+    def enable_stats_log(self, enabled: bool = True) -> None:
+        """Start (or stop) recording stats for each update cycle.
+
+        Get the recorded stats with App.stats_log.
+        """
+        self._runner.log_stats(enabled)
+
+    def stats_log(self) -> list[FrameStats]:
+        """Get the stats for each update cycle since the last call.
+
+        The stats are recorded only after calling App.enable_stats_log.
+        """
+        return [
+            FrameStats(
+                update=update,
+                update_time=update_ns / 1e9,
+                flush_time=flush_ns / 1e9,
+                changed_rows=changed,
+            )
+            for update, update_ns, flush_ns, changed in self._runner.take_stats_log()
+        ]
+
+    def _check_can_update(self) -> None:
+        if not self._started:
+            raise RuntimeError('app must be started before it can be updated')
+        if self._exited:
+            raise RuntimeError('trying to update exited app')
 
     @property
     def frame(self) -> Frame:
         """Get the image currently rendered on the virtual mock screen.
+
+        The frame is copied out of the runtime only once after each update.
+        Until the app state changes, the same Frame object is returned.
+        After that, only the rows changed since the previous frame are copied.
+        """
+        if not self._started:
+            raise RuntimeError('the app is not started, nothing is displayed')
+        generation = self._runner.generation
+        cached = self._frame
+        if cached is not None and cached[0] == generation:
+            return cached[2]
+        if cached is None:
+            tick = self._runner.tick
+            frame = Frame._from_rgb16(self._runner.get_frame(), width=WIDTH)
+        else:
+            _, since, frame = cached
+            tick, rows, data = self._runner.get_changed_rows(since)
+            if rows:
+                frame = _patch_rows(frame, rows, data)
+        self._frame = (generation, tick, frame)
+        return frame
+
+    @property
+    def frame_changed(self) -> bool:
+        """True if the last update changed at least one pixel on the screen.
+        """
+        if not self._started:
+            raise RuntimeError('the app is not started, nothing is displayed')
+        return self._runner.frame_changed()
+
+    def changed_regions(self) -> list[tuple[int, int, int, int]]:
+        """Get the regions of the screen changed by the last update.
+
+        Each region is a tuple of x, y, width, and height
+        of the bounding box of changed pixels in consecutive rows.
+        The list is empty if nothing has changed.
+        """
+        if not self._started:
+            raise RuntimeError('the app is not started, nothing is displayed')
+        return self._runner.changed_regions()
+
+    def pixel(self, x: int, y: int) -> Color:
+        """Get the color of a single pixel currently displayed on the screen.
+
+        The same as `app.frame.at(x, y)` but much faster because
+        only one pixel is copied out of the runtime.
+        """
+        if not self._started:
+            raise RuntimeError('the app is not started, nothing is displayed')
+        assert 0 <= x < WIDTH
+        assert 0 <= y < HEIGHT
+        return Color._from_rgb16(self._runner.get_pixel(x, y))
+
+    def region(self, x: int, y: int, width: int, height: int) -> Frame:
+        """Get a region of the image currently displayed on the screen.
+
+        The same as `app.frame.get_sub(...)` but faster because
+        only the requested region is copied out of the runtime.
         """
         if not self._started:
             raise RuntimeError('the app is not started, nothing is displayed')
-        buf = self._runner.get_frame()
-        return Frame._from_rgb16(buf, width=240)
+        assert 0 <= x < x + width <= WIDTH
+        assert 0 <= y < y + height <= HEIGHT
+        buf = self._runner.get_region(x, y, width, height)
+        return Frame._from_rgb16(buf, width=width)
 
     def __iter__(self) -> Iterator[Frame]:
         """Start the app if needed and on each iteration cycle update it and get Frame.
@@ -115,6 +467,82 @@ class App:
                 return
             yield self.frame
 
+    async def astart(self) -> None:
+        """Like App.start but runs in the event loop's default executor.
+
+        The GIL is released while the app code is running, so multiple apps
+        can be started and updated in parallel from one event loop.
+        Concurrent calls on the same App run one at a time, in order.
+        """
+        await self._in_executor(self.start)
+
+    async def aupdate(self, input: Input | None = None) -> None:
+        """Like App.update but runs in the event loop's default executor.
+
+        If called again before the previous call is done,
+        the new call waits for the previous one to finish.
+
+        Raises:
+            ExitedError:
+        """
+        await self._in_executor(lambda: self.update(input))
+
+    async def aframe(self) -> Frame:
+        """Like App.frame but runs in the event loop's default executor.
+
+        Waits for the pending App.aupdate calls to finish first.
+        """
+        return await self._in_executor(lambda: self.frame)
+
+    async def __aiter__(self) -> AsyncIterator[Frame]:
+        """Like App.__iter__ but updates and captures frames in an executor.
+        """
+        if not self._started:
+            await self.astart()
+        while True:
+            try:
+                await self.aupdate()
+            except ExitedError:
+                return
+            yield await self.aframe()
+
+    async def _in_executor(self, func: Callable[[], T]) -> T:
+        # The runtime can't be used by two threads at once,
+        # so overlapping calls on the same App wait for their turn.
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, func)
+
     def __repr__(self) -> str:
         id = f'{self._author_id}.{self._app_id}'
         return f"{type(self).__name__}('{id}')"
+
+
+def _patch_rows(frame: Frame, rows: list[int], data: bytes) -> Frame:
+    """Make a copy of the full-screen frame with the given rows replaced.
+    """
+    changed = array('H')
+    changed.frombytes(data)
+    buf = frame._buf[:]
+    for i, row in enumerate(rows):
+        buf[row * WIDTH:(row + 1) * WIDTH] = changed[i * WIDTH:(i + 1) * WIDTH]
+    return Frame._from_rgb16(buf, width=WIDTH)
+
+
+def _parse_id(id: str | tuple[str, str]) -> tuple[str, str]:
+    """Split the full app ID into the author ID and the app ID.
+    """
+    if isinstance(id, str):
+        left, sep, right = id.partition('.')
+        assert sep == '.'
+        id = (left, right)
+    author_id, app_id = id
+    assert 0 < len(author_id) <= 16
+    assert 0 < len(app_id) <= 16
+    return author_id, app_id
+
+
+def _vfs_path_str(vfs_path: Path | None) -> str:
+    """Convert the VFS path into the format accepted by Runner.
+    """
+    return str(vfs_path.resolve()) if vfs_path else ''
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from ._frame import Frame
+
+
+class Checkpoint:
+    """A replay checkpoint of an App created by App.checkpoint.
+
+    The checkpoint can be restored with App.restore or used to create
+    a new App with App.from_checkpoint. Checkpoints can be pickled,
+    so you can also share them between processes or save them on disk.
+
+    It's not a snapshot of the app memory: the checkpoint records
+    all inputs the app has received since the start. Restoring it
+    starts a fresh runtime and replays all the recorded updates
+    in a single native call. So the cost of restoring is creating
+    a new runtime plus running all the updates again: the longer
+    the app had run, the slower it is. To explore many branches
+    from the same point without replaying the prefix each time,
+    use fork_map instead.
+
+    The app must be deterministic: given the same inputs, it must
+    produce the same state. If the restored frame differs from the
+    saved one, App.restore raises RuntimeError.
+    """
+    __slots__ = (
+        '_app_id',
+        '_author_id',
+        '_frame',
+        '_inputs',
+        '_updates',
+        '_vfs_path',
+    )
+    _author_id: str
+    _app_id: str
+    _vfs_path: Path | None
+    _inputs: tuple[tuple[int, int, int, int], ...]
+    _updates: int
+    _frame: Frame
+
+    def __init__(
+        self, *,
+        author_id: str,
+        app_id: str,
+        vfs_path: Path | None,
+        inputs: tuple[tuple[int, int, int, int], ...],
+        updates: int,
+        frame: Frame,
+    ) -> None:
+        self._author_id = author_id
+        self._app_id = app_id
+        self._vfs_path = vfs_path
+        self._inputs = inputs
+        self._updates = updates
+        self._frame = frame
+
+    @property
+    def id(self) -> str:
+        """The full ID of the app the checkpoint belongs to.
+        """
+        return f'{self._author_id}.{self._app_id}'
+
+    @property
+    def updates(self) -> int:
+        """How many update cycles the app had run when the checkpoint was made.
+        """
+        return self._updates
+
+    @property
+    def frame(self) -> Frame:
+        """The frame displayed when the checkpoint was made.
+        """
+        return self._frame
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__} {self.id} updates={self._updates}>'
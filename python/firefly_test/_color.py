@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from colorsys import rgb_to_hls, rgb_to_hsv, rgb_to_yiq
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import ClassVar, Final, Mapping
 
 from . import _rust
@@ -19,9 +20,14 @@ class RGB24:
 
 class Color:
     """An RGB color of a pixel on the Frame.
+
+    There are only 65,536 colors that Firefly can display,
+    so every Color instance is interned and immutable: all constructors
+    return the same instance for the same color.
     """
-    __slots__ = ('_raw',)
-    _raw: _rust.Color
+    __slots__ = ('_rgb16', '_rgb24')
+    _rgb16: int
+    _rgb24: RGB24
 
     # Colors from the default color palette (SWEETIE 16)
     # https://lospec.com/palette-list/sweetie-16
@@ -124,27 +130,20 @@ class Color:
         Keep in mind that internally the color in Firefly is represented as
         16 bits, not 24, so some precision is lost in conversions.
         """
-        self = cls()
-        r = (raw >> 16) & 0xFF
-        g = (raw >> 8) & 0xFF
-        b = raw & 0xFF
-        self._raw = _rust.Color(r, g, b)
-        return self
+        return cls._from_rgb16(_rgb24_to_rgb16(raw & 0xFFFFFF))
 
     @classmethod
     def _from_rgb16(cls, raw: int) -> Color:
-        self = cls()
-        self._raw = _rust.Color.from_rgb16(raw)
-        return self
-
-    @property
-    def _rgb24(self) -> RGB24:
-        r, g, b = self._raw.to_rgb()
-        return RGB24(r, g, b)
-
-    @property
-    def _rgb16(self) -> int:
-        return self._raw.to_rgb16()
+        color = _FROM_RGB16[raw]
+        if color is None:
+            # The RGB conversion is done in Rust only once per color,
+            # all component accessors later just read the cached value.
+            r, g, b = _rust.Color.from_rgb16(raw).to_rgb()
+            color = object.__new__(Color)
+            object.__setattr__(color, '_rgb16', raw)
+            object.__setattr__(color, '_rgb24', RGB24(r, g, b))
+            _FROM_RGB16[raw] = color
+        return color
 
     @property
     def r(self) -> int:
@@ -189,8 +188,11 @@ class Color:
 
         https://en.wikipedia.org/wiki/HSL_and_HSV
         """
-        rgb = self._rgb24
-        return rgb_to_hls(rgb.r / 255, rgb.g / 255, rgb.b / 255)
+        hls = _HLS[self._rgb16]
+        if hls is None:
+            hls = rgb_to_hls(*self.rgb)
+            _HLS[self._rgb16] = hls
+        return hls
 
     @property
     def hsv(self) -> tuple[float, float, float]:
@@ -200,8 +202,11 @@ class Color:
 
         https://en.wikipedia.org/wiki/HSL_and_HSV
         """
-        rgb = self._rgb24
-        return rgb_to_hsv(rgb.r / 255, rgb.g / 255, rgb.b / 255)
+        hsv = _HSV[self._rgb16]
+        if hsv is None:
+            hsv = rgb_to_hsv(*self.rgb)
+            _HSV[self._rgb16] = hsv
+        return hsv
 
     @property
     def yiq(self) -> tuple[float, float, float]:
@@ -209,8 +214,11 @@ class Color:
 
         https://en.wikipedia.org/wiki/YIQ
         """
-        rgb = self._rgb24
-        return rgb_to_yiq(rgb.r / 255, rgb.g / 255, rgb.b / 255)
+        yiq = _YIQ[self._rgb16]
+        if yiq is None:
+            yiq = rgb_to_yiq(*self.rgb)
+            _YIQ[self._rgb16] = yiq
+        return yiq
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, str):
@@ -219,10 +227,11 @@ class Color:
             color = PAT_TO_COLOR[other]
             return self._rgb16 == color
         if isinstance(other, Color):
-            return self._rgb16 == other._rgb16
+            # All instances are interned, so equal colors are the same object.
+            return self is other
         if isinstance(other, int):
             assert 0x000000 <= other <= 0xFFFFFF
-            return self._rgb16 == Color.from_rgb24(other)._rgb16
+            return self is Color.from_rgb24(other)
         return NotImplemented
 
     def __repr__(self) -> str:
@@ -245,6 +254,46 @@ class Color:
     def __hash__(self) -> int:
         return hash(self._rgb16)
 
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __copy__(self) -> Color:
+        return self
+
+    def __deepcopy__(self, memo: object) -> Color:
+        return self
+
+    def __reduce__(self) -> tuple[object, tuple[int]]:
+        # Unpickling must go through the cache to preserve identity.
+        return (Color._from_rgb16, (self._rgb16,))
+
+
+_FROM_RGB16: Final[list[Color | None]] = [None] * 0x10000
+"""Interned colors indexed by their RGB565 value.
+"""
+
+
+# Lazily filled tables of color space conversions indexed by RGB565 value.
+_HLS: Final[list[tuple[float, float, float] | None]] = [None] * 0x10000
+_HSV: Final[list[tuple[float, float, float] | None]] = [None] * 0x10000
+_YIQ: Final[list[tuple[float, float, float] | None]] = [None] * 0x10000
+
+
+@lru_cache(maxsize=4096)
+def _rgb24_to_rgb16(raw: int) -> int:
+    """Convert RGB888 into RGB565.
+
+    The cache is bounded: the RGB888 space is too big to keep all of it
+    and the colors themselves are interned by their RGB565 value anyway.
+    """
+    r = (raw >> 16) & 0xFF
+    g = (raw >> 8) & 0xFF
+    b = raw & 0xFF
+    return _rust.Color(r, g, b).to_rgb16()
+
 
 # Color instances can be initialized only after Color class is created.
 Color.BLACK = Color.from_rgb24(0x1A1C2C)
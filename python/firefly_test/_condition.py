@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Callable, Final
+
+from ._frame import HEIGHT, WIDTH
+from ._pattern import Pattern
+
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+    from ._color import Color
+    from ._frame import Frame
+
+
+# Check modes. Must match the modes in src/condition.rs.
+EQUAL: Final = 0
+DIFFER: Final = 1
+CONTAINS: Final = 2
+LACKS: Final = 3
+
+
+@dataclass(frozen=True)
+class _Check:
+    """A single check of a frame region evaluated by Runner.wait_until.
+    """
+
+    x: int
+    y: int
+    width: int
+    height: int
+
+    values: array[int] | None
+    """RGB565 values to compare the region pixels with.
+
+    None for the "changed" condition. The values are filled
+    from the current frame when App.wait_until is called.
+    """
+
+    mode: int
+
+    def _resolve(self, buf: array[int]) -> _Check:
+        """Fill the values from the frame buffer if not set yet.
+        """
+        if self.values is not None:
+            return self
+        values = array('H')
+        for y in range(self.y, self.y + self.height):
+            start = y * WIDTH + self.x
+            values.extend(buf[start:start + self.width])
+        return replace(self, values=values)
+
+    def _raw(self) -> tuple[int, int, int, int, list[int], int]:
+        assert self.values is not None
+        values = self.values.tolist()
+        return (self.x, self.y, self.width, self.height, values, self.mode)
+
+
+class Condition:
+    """A condition on the displayed frame for App.wait_until.
+
+    The condition is checked in the runtime after each update,
+    without converting the frame into Python objects.
+    Combine conditions with "&" to wait until all of them are satisfied.
+    """
+    __slots__ = ('_checks',)
+    _checks: tuple[_Check, ...]
+
+    def __init__(self, *checks: _Check) -> None:
+        for check in checks:
+            _check_region(check.x, check.y, check.width, check.height)
+        self._checks = checks
+
+    @classmethod
+    def pixel(cls, x: int, y: int, color: Color) -> Self:
+        """The pixel at the given coordinates has the given color.
+        """
+        return cls(_Check(x, y, 1, 1, array('H', [color._rgb16]), EQUAL))
+
+    @classmethod
+    def region(cls, x: int, y: int, frame: Frame) -> Self:
+        """The region at the given coordinates looks exactly like the frame.
+
+        Use Frame.get_sub to cut out the expected region from a known frame.
+        """
+        return cls(_Check(x, y, frame.width, frame.height, frame._buf, EQUAL))
+
+    @classmethod
+    def changed(
+        cls,
+        x: int = 0,
+        y: int = 0,
+        width: int = WIDTH,
+        height: int = HEIGHT,
+    ) -> Self:
+        """The region differs from how it looks when App.wait_until is called.
+
+        By default, the region is the whole frame.
+        """
+        return cls(_Check(x, y, width, height, None, DIFFER))
+
+    @classmethod
+    def pattern(cls, pattern: str | Pattern, x: int = 0, y: int = 0) -> Self:
+        """The region at the given coordinates matches the pattern.
+
+        See README for the list of supported symbols.
+        """
+        if isinstance(pattern, str):
+            pattern = Pattern.compile(pattern)
+        checks = [
+            _Check(x + offset, y + i, len(values), 1, values, EQUAL)
+            for i, line in enumerate(pattern._lines)
+            for offset, values in line.runs
+        ]
+        return cls(*checks)
+
+    @classmethod
+    def has_color(
+        cls,
+        *colors: Color,
+        x: int = 0,
+        y: int = 0,
+        width: int = WIDTH,
+        height: int = HEIGHT,
+    ) -> Self:
+        """At least one pixel in the region has one of the given colors.
+
+        By default, the region is the whole frame.
+        """
+        assert colors
+        values = array('H', [c._rgb16 for c in colors])
+        return cls(_Check(x, y, width, height, values, CONTAINS))
+
+    @classmethod
+    def no_color(
+        cls,
+        *colors: Color,
+        x: int = 0,
+        y: int = 0,
+        width: int = WIDTH,
+        height: int = HEIGHT,
+    ) -> Self:
+        """None of the pixels in the region has any of the given colors.
+
+        By default, the region is the whole frame.
+        """
+        assert colors
+        values = array('H', [c._rgb16 for c in colors])
+        return cls(_Check(x, y, width, height, values, LACKS))
+
+    def _resolve(self, get_buf: Callable[[], array[int]]) -> list[_Check]:
+        """Fill the "changed" checks using the current frame buffer.
+
+        The frame is requested only if there are such checks.
+        """
+        if all(check.values is not None for check in self._checks):
+            return list(self._checks)
+        buf = get_buf()
+        return [check._resolve(buf) for check in self._checks]
+
+    def __and__(self, other: Condition) -> Self:
+        return type(self)(*self._checks, *other._checks)
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__} checks={len(self._checks)}>'
+
+
+def _check_region(x: int, y: int, width: int, height: int) -> None:
+    if width <= 0 or height <= 0:
+        raise ValueError('the region is empty')
+    if x < 0 or y < 0 or x + width > WIDTH or y + height > HEIGHT:
+        raise ValueError('the region is out of the frame')
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Diff:
+    """The difference between two frames of the same size.
+
+    Returned by Frame.diff.
+    """
+
+    width: int
+    """The width of the compared frames.
+    """
+
+    count: int
+    """How many pixels differ.
+    """
+
+    mask: bytes
+    """One byte per pixel: 1 if the pixel differs and 0 if it doesn't.
+
+    The pixels go in the same order as when iterating over Frame.
+    """
+
+    row_counts: tuple[int, ...]
+    """How many pixels differ in each line of the frame.
+    """
+
+    bbox: tuple[int, int, int, int] | None
+    """The smallest region that contains all mismatched pixels.
+
+    It's a tuple of x, y, width, and height, the same arguments
+    as accepted by Frame.get_sub. None if the frames are the same.
+    """
+
+    @property
+    def height(self) -> int:
+        """The height of the compared frames.
+        """
+        return len(self.row_counts)
+
+    @property
+    def lines(self) -> int:
+        """How many lines have at least one mismatched pixel.
+        """
+        return sum(1 for c in self.row_counts if c)
+
+    def at(self, x: int, y: int) -> bool:
+        """Check if the pixel with the given coordinates differs.
+        """
+        assert 0 <= x < self.width
+        assert 0 <= y < self.height
+        return self.mask[y * self.width + x] == 1
+
+    def __bool__(self) -> bool:
+        """True if the frames differ.
+        """
+        return self.count != 0
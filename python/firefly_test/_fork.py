@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import os
+import pickle
+import select
+import signal
+import traceback
+from typing import Any, Callable, Iterable, NoReturn, TypeVar
+
+
+T = TypeVar('T')
+B = TypeVar('B')
+R = TypeVar('R')
+
+# How many bytes to read from a worker pipe at once.
+CHUNK_SIZE = 1 << 16
+
+
+class ForkError(Exception):
+    """Raised by fork_map if a worker process failed.
+    """
+    pass
+
+
+def fork_map(
+    app: T,
+    branches: Iterable[B],
+    func: Callable[[T, B], R],
+    *,
+    workers: int | None = None,
+) -> list[R]:
+    """Call func(app, branch) for each branch in a forked copy of the process.
+
+    Boot the app and drive it to the point you want to explore from,
+    and then use fork_map to try many different input sequences from there.
+    Each branch runs in its own child process which inherits the running app
+    (including its runtime) through copy-on-write memory, so the app doesn't
+    need to be started again and its memory is not copied unless changed.
+
+    The results are returned in the same order as the branches.
+    They must be picklable. If func raises an exception in any of the
+    workers, ForkError is raised after all branches are done.
+
+    Works only on systems supporting os.fork (Linux, macOS).
+    Make sure no other threads are running when calling it.
+
+    Args:
+        app: the object to share with workers. Usually, App.
+        branches: the arguments to pass into func, one per worker.
+        func: the function to call in each worker.
+        workers: how many workers to run in parallel.
+            Defaults to the number of CPUs.
+    """
+    if not hasattr(os, 'fork'):  # pragma: no cover
+        raise RuntimeError('fork_map requires os.fork')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    assert workers > 0
+    pending = list(enumerate(branches))
+    pending.reverse()
+    # For each result pipe: the branch index, the worker pid, and the read data.
+    running: dict[int, tuple[int, int, list[bytes]]] = {}
+    results: dict[int, R] = {}
+    errors: list[str] = []
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                index, branch = pending.pop()
+                pid, fd = _spawn(app, branch, func)
+                running[fd] = (index, pid, [])
+            # Collect whichever workers are done, the rest keep running.
+            ready, _, _ = select.select(list(running), [], [])
+            for fd in ready:
+                index, pid, chunks = running[fd]
+                chunk = os.read(fd, CHUNK_SIZE)
+                if chunk:
+                    chunks.append(chunk)
+                    continue
+                del running[fd]
+                os.close(fd)
+                _, status = os.waitpid(pid, 0)
+                ok, value = _load(b''.join(chunks), status)
+                if ok:
+                    results[index] = value
+                else:
+                    errors.append(f'branch #{index}: {value}')
+    finally:
+        for fd, (_, pid, _) in running.items():
+            os.close(fd)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+    if errors:
+        raise ForkError('\n'.join(errors))
+    return [results[i] for i in range(len(results))]
+
+
+def _load(data: bytes, status: int) -> tuple[bool, Any]:
+    """Unpickle the result sent by a worker.
+
+    If the worker failed, return False and the error message.
+    """
+    if not data:
+        code = os.waitstatus_to_exitcode(status)
+        return False, f'worker exited with code {code}'
+    try:
+        ok, value = pickle.loads(data)
+    except Exception as exc:
+        return False, f'cannot load the result: {type(exc).__name__}: {exc}'
+    return ok, value
+
+
+def _spawn(app: T, branch: B, func: Callable[[T, B], R]) -> tuple[int, int]:
+    """Start a worker process and return its pid and the result pipe.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _run_worker(app, branch, func, write_fd)
+    os.close(write_fd)
+    return pid, read_fd
+
+
+def _run_worker(  # pragma: no cover
+    app: T,
+    branch: B,
+    func: Callable[[T, B], R],
+    fd: int,
+) -> NoReturn:
+    """Run func in the child process, send the result, and exit.
+    """
+    code = 0
+    try:
+        try:
+            data = pickle.dumps((True, func(app, branch)))
+        except BaseException:
+            data = pickle.dumps((False, traceback.format_exc()))
+        with os.fdopen(fd, 'wb') as stream:
+            stream.write(data)
+    except BaseException:
+        code = 1
+    finally:
+        # Skip atexit hooks and cleanup inherited from the parent process.
+        os._exit(code)
@@ -1,18 +1,44 @@
 from __future__ import annotations
 
-import struct
-import zlib
+import operator
+from array import array
 from collections import Counter
-from io import BytesIO
+from hashlib import blake2b
 from pathlib import Path
-from typing import TYPE_CHECKING, BinaryIO, Final, Iterator, Mapping, overload
-
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    Final,
+    Iterable,
+    Iterator,
+    Mapping,
+    TypeVar,
+    overload,
+)
+
+from . import _snapshot
 from ._color import PAT_TO_COLOR, Color
+from ._diff import Diff
+from ._pattern import Pattern
+from ._png import write_png
+
 
+try:
+    import numpy
+    _HAS_NUMPY = True
+except ImportError:
+    _HAS_NUMPY = False
 
 if TYPE_CHECKING:
+    from numpy.typing import NDArray
     from typing_extensions import Self
 
+    from ._snapshot import Encoding
+
+T = TypeVar('T')
+
 WIDTH = 240
 """Screen width in pixels.
 
@@ -37,29 +63,103 @@ END = '\033[0m'
 
 
 class Frame:
-    __slots__ = ('_buf', '_width')
-    _buf: list[Color]
+    """An image: either the whole screen or its subregion.
+
+    Pixels are stored as raw RGB565 values in a compact array.
+    Color objects are created only when you access individual pixels.
+    """
+    __slots__ = ('_buf', '_digest', '_width')
+    _buf: array[int]
     _width: int
+    _digest: bytes | None
 
     def __init__(self, colors: list[Color], *, width: int) -> None:
         assert type(colors[0]) is Color
+        buf = array('H', [c._rgb16 for c in colors])
+        self._init(buf, width=width)
+
+    def _init(self, buf: array[int], *, width: int) -> None:
         assert 0 <= width <= WIDTH
-        assert 0 < len(colors) <= WIDTH * HEIGHT
-        assert len(colors) % width == 0
+        assert 0 < len(buf) <= WIDTH * HEIGHT
+        assert len(buf) % width == 0
         self._width = width
-        self._buf = colors
+        self._buf = buf
+        self._digest = None
 
     @classmethod
-    def _from_rgb16(cls, buf: list[int], *, width: int) -> Self:
-        assert type(buf[0]) is int
-        colors = [Color._from_rgb16(c) for c in buf]
-        return cls(colors, width=width)
+    def _from_rgb16(cls, buf: Iterable[int] | bytes, *, width: int) -> Self:
+        """Create a Frame from raw RGB565 values.
+
+        If an array is passed, it is used as is, without copying.
+        If bytes are passed (like the ones returned by Runner.get_frame),
+        they are interpreted as 2-bytes values in the native byte order
+        and copied in bulk.
+        """
+        if isinstance(buf, bytes):
+            raw = buf
+            buf = array('H')
+            buf.frombytes(raw)
+        elif not isinstance(buf, array):
+            buf = array('H', buf)
+        assert buf.typecode == 'H'
+        self = cls.__new__(cls)
+        self._init(buf, width=width)
+        return self
 
     @classmethod
     def from_rgb24(cls, buf: list[int], *, width: int) -> Self:
         assert type(buf[0]) is int
-        colors = [Color.from_rgb24(c) for c in buf]
-        return cls(colors, width=width)
+        cache: dict[int, int] = {}
+        for c in buf:
+            if c not in cache:
+                cache[c] = Color.from_rgb24(c)._rgb16
+        return cls._from_rgb16(map(cache.__getitem__, buf), width=width)
+
+    @classmethod
+    def from_numpy(cls, arr: NDArray[Any]) -> Self:
+        """Create a Frame from a numpy array.
+
+        The array can be either a (height, width) array of raw RGB565 values
+        or a (height, width, 3) array of 8-bit RGB components.
+        The latter is the same format as returned by `Frame.to_numpy(rgb=True)`
+        and used by most image processing libraries.
+        """
+        _require_numpy()
+        width = arr.shape[1]
+        if arr.ndim == 2:
+            raw = numpy.ascontiguousarray(arr, dtype=numpy.uint16)
+        else:
+            assert arr.ndim == 3
+            assert arr.shape[2] == 3
+            rgb = arr.astype(numpy.uint32).reshape(-1, 3)
+            packed = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+            values, inverse = numpy.unique(packed, return_inverse=True)
+            lut = numpy.array(
+                [Color.from_rgb24(int(v))._rgb16 for v in values],
+                dtype=numpy.uint16,
+            )
+            raw = lut[inverse.reshape(-1)]
+        buf = array('H')
+        buf.frombytes(raw.tobytes())
+        return cls._from_rgb16(buf, width=width)
+
+    def to_numpy(self, *, rgb: bool = False) -> NDArray[Any]:
+        """Convert the Frame into a numpy array.
+
+        By default, the result is a (height, width) array of raw RGB565 values.
+        If rgb is True, the result is a (height, width, 3) array
+        of 8-bit RGB components.
+        """
+        _require_numpy()
+        raw = self._as_numpy()
+        shape = (self.height, self._width)
+        if not rgb:
+            return numpy.copy(raw).reshape(shape)
+        values, inverse = numpy.unique(raw, return_inverse=True)
+        colors = [Color._from_rgb16(int(v))._rgb24 for v in values]
+        lut = numpy.array([(c.r, c.g, c.b) for c in colors], dtype=numpy.uint8)
+        res: NDArray[numpy.uint8] = lut[inverse.reshape(-1)]
+        return res.reshape((*shape, 3))
 
     @property
     def width(self) -> int:
@@ -79,7 +179,7 @@ class Frame:
             assert 0 <= x < self.width
             assert 0 <= y < self.height
             x = y * self._width + x
-        return self._buf[x]
+        return Color._from_rgb16(self._buf[x])
 
     def get_sub(
         self, *,
@@ -103,13 +203,13 @@ class Frame:
         assert 0 <= x + width <= self.width
         assert 0 <= y + height <= self.height
 
-        res_buf = []
+        res_buf = array('H')
         for line_no in range(y, y + height):
             start = line_no * self._width + x
             end = start + width
             line = self._buf[start:end]
             res_buf.extend(line)
-        return type(self)(res_buf, width=width)
+        return self._from_rgb16(res_buf, width=width)
 
     def to_dict(self) -> dict[Color, int]:
         """Get the dict of how many pixels of each color the frame has.
@@ -121,20 +221,60 @@ class Frame:
     def to_set(self) -> set[Color]:
         """Get the set of all colors present on the frame.
         """
+        if _HAS_NUMPY:
+            values = numpy.unique(self._as_numpy())
+            return {Color._from_rgb16(int(v)) for v in values}
         return set(self.to_counter())
 
+    def digest(self) -> bytes:
+        """Get a hash of the frame content.
+
+        The digest is the same for frames with the same size and pixels,
+        on any machine and between runs. It is calculated only once
+        and then cached, which makes comparing frames with known digests
+        and deduplicating frames (using sets or dicts) very fast.
+        """
+        if self._digest is None:
+            h = blake2b(digest_size=16)
+            h.update(self._width.to_bytes(2, _BYTE_ORDER))
+            h.update(_snapshot.pack(self._buf))
+            self._digest = h.digest()
+        return self._digest
+
+    def to_rgb24(self) -> list[int]:
+        """Get the true-color RGB representation of all pixels.
+
+        Values go in the same order as Frame iteration. For example,
+        0x00FF00 represents pure green. Each distinct color is converted
+        only once, so it's much faster than calling int() on every pixel.
+        """
+        lut = self._palette(lambda c: int(c._rgb24))
+        return list(map(lut.__getitem__, self._buf))
+
     def to_counter(self) -> Counter[Color]:
         """Get the count of pixels of each color on the frame.
         """
-        return Counter(self)
-
-    def assert_match(self, expected: str | Path | BinaryIO | Frame) -> None:
+        if _HAS_NUMPY:
+            counts = numpy.bincount(self._as_numpy())
+            return Counter({
+                Color._from_rgb16(int(c)): int(counts[c])
+                for c in numpy.flatnonzero(counts)
+            })
+        counter = Counter(self._buf)
+        return Counter({Color._from_rgb16(c): n for c, n in counter.items()})
+
+    def assert_match(
+        self,
+        expected: str | Pattern | Path | BinaryIO | Frame,
+    ) -> None:
         """Assert that the frame matches a pattern, a Frame, or a snapshot.
 
         Raises AssertionError on mismatch. The error message contains a nice diff
         and some helpful information about the failure.
         """
         if isinstance(expected, str):
+            expected = Pattern.compile(expected)
+        if isinstance(expected, Pattern):
             self._match_pattern(expected)
             return
         if isinstance(expected, Frame):
@@ -146,16 +286,15 @@ class Frame:
             return
         self._match_snapshot(expected)
 
-    def _match_pattern(self, pattern: str) -> None:
+    def _match_pattern(self, pattern: Pattern) -> None:
         """Raise AssertionError if the Frame doesn't match the given pattern.
         """
         report = []
-        patterns = [p.strip() for p in pattern.splitlines()]
-        patterns = [p for p in patterns if p]
         failures = 0
-        for i, pattern_line in enumerate(patterns):
-            pattern_line = pattern_line.strip()
-            if self._check_line(i, pattern_line):
+        checks = pattern._check_lines(self._buf, self._width)
+        for i, (line, ok) in enumerate(zip(pattern._lines, checks)):
+            pattern_line = line.text
+            if ok:
                 color = GREEN
                 sign = '=='
             else:
@@ -190,87 +329,129 @@ class Frame:
             msg += f'Actual: {self.height}. Expected: {expected.height}.'
             raise AssertionError(msg)
 
-        if self._buf == expected._buf:
+        if self._digest is not None and expected._digest is not None:
+            if self._digest == expected._digest:
+                return
+        elif self._buf == expected._buf:
             return
 
+        diff = self.diff(expected)
+        assert diff.bbox is not None
+        x, y, width, height = diff.bbox
         msg = '🖼 Unexpected Frame content.\n'
         if path is not None:
             msg += f'Snapshot: {path}.\n'
-        bad_pixels = sum(a != e for a, e in zip(self._buf, expected._buf))
-        msg += f'Pixels mismatch: {bad_pixels} out of {len(self._buf)}.\n'
-        bad_lines = 0
-        first_bad = None
-        last_bad = 0
+        msg += f'Pixels mismatch: {diff.count} out of {len(self._buf)}.\n'
+        msg += f'Lines mismatch: {diff.lines} out of {self.height}.\n'
+        msg += f'First mismatched line: {y} (0-indexed).\n'
+        msg += f'Last mismatched line: {y + height - 1} (0-indexed).\n'
+        msg += f'Mismatched region: {x=}, {y=}, {width=}, {height=}.\n'
+        raise AssertionError(msg)
+
+    def diff(self, other: Frame) -> Diff:
+        """Find which pixels differ between this and the other frame.
+
+        The frames must be of the same size.
+        """
+        if self._width != other._width or len(self._buf) != len(other._buf):
+            raise TypeError('can only diff frames of the same size')
+        if _HAS_NUMPY:
+            return self._diff_numpy(other)
         width = self._width
-        for i in range(0, len(self._buf), width):
+        mask = bytearray(len(self._buf))
+        counts = []
+        min_x = width
+        max_x = -1
+        bad_rows = []
+        for line_no, i in enumerate(range(0, len(self._buf), width)):
             act_line = self._buf[i:i+width]
-            exp_line = expected._buf[i:i+width]
-            if act_line != exp_line:
-                line_no = i // width
-                last_bad = line_no
-                if first_bad is None:
-                    first_bad = line_no
-                bad_lines += 1
-        msg += f'Lines mismatch: {bad_lines} out of {self.height}.\n'
-        msg += f'First mismatched line: {first_bad} (0-indexed).\n'
-        msg += f'Last mismatched line: {last_bad} (0-indexed).\n'
-        raise AssertionError(msg)
+            exp_line = other._buf[i:i+width]
+            # Fast path: compare the whole line at once.
+            if act_line == exp_line:
+                counts.append(0)
+                continue
+            line_mask = bytes(map(operator.ne, act_line, exp_line))
+            mask[i:i+width] = line_mask
+            counts.append(line_mask.count(1))
+            min_x = min(min_x, line_mask.find(1))
+            max_x = max(max_x, line_mask.rfind(1))
+            bad_rows.append(line_no)
+        bbox = None
+        if bad_rows:
+            y = bad_rows[0]
+            bbox = (min_x, y, max_x - min_x + 1, bad_rows[-1] - y + 1)
+        return Diff(
+            width=width,
+            count=sum(counts),
+            mask=bytes(mask),
+            row_counts=tuple(counts),
+            bbox=bbox,
+        )
 
     @classmethod
     def read(cls, stream: BinaryIO | Path) -> Self:
         """Read from a file a Frame serialized with Frame.write.
+
+        Snapshots in the legacy (v1) format are supported as well.
         """
         if isinstance(stream, Path):
-            with stream.open('rb') as bin_stream:
-                return cls.read(bin_stream)
-        decomp_bytes = zlib.decompress(stream.read())
-        decomp_stream = BytesIO(decomp_bytes)
-        width = int.from_bytes(decomp_stream.read(2), _BYTE_ORDER)
-        buf = []
-        while True:
-            chunk = decomp_stream.read(2)
-            if len(chunk) != 2:
-                break
-            buf.append(int.from_bytes(chunk, _BYTE_ORDER))
+            data = stream.read_bytes()
+            if not data:
+                raise ValueError(f'snapshot is empty: {stream}')
+            buf, width = _snapshot.decode(data)
+            return cls._from_rgb16(buf, width=width)
+        buf, width = _snapshot.decode(stream.read())
         return cls._from_rgb16(buf, width=width)
 
-    def write(self, stream: BinaryIO | Path) -> None:
+    def write(
+        self,
+        stream: BinaryIO | Path,
+        *,
+        encoding: Encoding = 'auto',
+    ) -> None:
         """Serialize the Frame into a file as a binary.
+
+        The encoding can be one of:
+
+        * "palette": compressed color indices. Requires at most 256 colors.
+        * "rle": compressed run-length encoded pixels.
+        * "zlib": compressed raw pixels.
+        * "raw": uncompressed raw pixels. Biggest but fastest to read.
+        * "auto" (default): "zlib". Palette snapshots are a bit smaller
+          but much slower to read and write.
         """
         if isinstance(stream, Path):
             with stream.open('wb') as bin_stream:
-                self.write(bin_stream)
+                self.write(bin_stream, encoding=encoding)
                 return
-        bs = bytearray()
-        bs.extend(self._width.to_bytes(2, _BYTE_ORDER))
-        for pixel in self._buf:
-            bs.extend(pixel._rgb16.to_bytes(2, _BYTE_ORDER))
-        stream.write(zlib.compress(bs))
+        stream.write(_snapshot.encode(self._buf, self._width, encoding))
 
     def to_png(self, stream: BinaryIO | Path) -> None:
         """Save the Frame as a PNG file.
+
+        Frames with up to 256 colors (which is almost every frame)
+        are saved as indexed-color images, the rest as true-color images.
         """
         if isinstance(stream, Path):
             with stream.open('wb') as bin_stream:
                 self.to_png(bin_stream)
                 return
-        # https://gitlab.com/drj11/minpng/-/blob/main/minpng.py?ref_type=heads
-        stream.write(bytearray([137, 80, 78, 71, 13, 10, 26, 10]))
-        header = struct.pack(
-            '>2LBBBBB',
-            self.width,
-            self.height,
-            8, 2, 0, 0, 0,
+        colors = self._palette(lambda c: int(c._rgb24).to_bytes(3, 'big'))
+        palette = None
+        if len(colors) <= 256:
+            values = sorted(colors)
+            index = {c: i for i, c in enumerate(values)}
+            palette = b''.join(colors[c] for c in values)
+            pixels = bytes(map(index.__getitem__, self._buf))
+        else:
+            pixels = b''.join(map(colors.__getitem__, self._buf))
+        write_png(
+            stream,
+            pixels,
+            width=self.width,
+            height=self.height,
+            palette=palette,
         )
-        _write_chunk(stream, b'IHDR', header)
-        bs = bytearray()
-        for i in range(0, len(self._buf), self._width):
-            bs.append(0)
-            for pixel in self._buf[i:i+self._width]:
-                rgb24 = (pixel.r << 16) | (pixel.g << 8) | pixel.b
-                bs.extend(rgb24.to_bytes(3, 'big'))
-        _write_chunk(stream, b'IDAT', zlib.compress(bs))
-        _write_chunk(stream, b'IEND', bytes())
 
     def __iter__(self) -> Iterator[Color]:
         """Iterate over all pixels in the frame.
@@ -278,16 +459,18 @@ class Frame:
         Iteration goes left-to-right and top-to-bottom,
         like scanlines in the old CRT displays or how you read English text.
         """
-        return iter(self._buf)
+        return map(Color._from_rgb16, self._buf)
 
     def __contains__(self, val: object) -> bool:
         """Check if the Frame contains a pixel of the given Color.
         """
         if isinstance(val, int):
             assert 0x000000 <= val <= 0xFFFFFF
-            return Color.from_rgb24(val) in self._buf
+            val = Color.from_rgb24(val)
         if isinstance(val, Color):
-            return val in self._buf
+            if _HAS_NUMPY:
+                return bool((self._as_numpy() == val._rgb16).any())
+            return val._rgb16 in self._buf
         t = type(val).__name__
         raise TypeError(f'Frame can contain only Color, not {t}')
 
@@ -311,25 +494,27 @@ class Frame:
             x, y = i.start
             ex, ey = i.stop
             return self.get_sub(x=x, y=y, width=ex - x, height=ey - y)
-        return self._buf[i]
+        return Color._from_rgb16(self._buf[i])
 
     def __ne__(self, other: object) -> bool:
         return not self.__eq__(other)
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, str):
-            patterns = [p.strip() for p in other.splitlines()]
-            patterns = [p for p in patterns if p]
-            for i, pattern in enumerate(patterns):
-                if not self._check_line(i, pattern):
-                    return False
-            return True
+            other = Pattern.compile(other)
+        if isinstance(other, Pattern):
+            return all(other._check_lines(self._buf, self._width))
         if isinstance(other, type(self)):
             if self._width != other._width:
                 raise TypeError('can only compare frames of the same width')
+            if self._digest is not None and other._digest is not None:
+                return self._digest == other._digest
             return self._buf == other._buf
         return NotImplemented
 
+    def __hash__(self) -> int:
+        return hash(self.digest())
+
     def __str__(self) -> str:
         """Represent the frame as a pattern.
         """
@@ -341,36 +526,49 @@ class Frame:
     def __len__(self) -> int:
         return len(self._buf)
 
-    def _format_line(self, line_no: int) -> str:
-        """Represent the given line as a pattern.
+    def _diff_numpy(self, other: Frame) -> Diff:
+        """Vectorized implementation of Frame.diff.
         """
-        i = line_no * self._width
-        raw_line = self._buf[i:i+self._width]
-        return ''.join(_COLOR_TO_PAT.get(c._rgb16, '*') for c in raw_line)
+        mask = self._as_numpy() != other._as_numpy()
+        rows = mask.reshape(-1, self._width)
+        row_counts = tuple(int(c) for c in rows.sum(axis=1))
+        bad_rows = numpy.flatnonzero(row_counts)
+        bbox = None
+        if len(bad_rows):
+            bad_cols = numpy.flatnonzero(rows.any(axis=0))
+            x = int(bad_cols[0])
+            y = int(bad_rows[0])
+            width = int(bad_cols[-1]) - x + 1
+            height = int(bad_rows[-1]) - y + 1
+            bbox = (x, y, width, height)
+        return Diff(
+            width=self._width,
+            count=sum(row_counts),
+            mask=mask.astype(numpy.uint8).tobytes(),
+            row_counts=row_counts,
+            bbox=bbox,
+        )
+
+    def _as_numpy(self) -> NDArray[numpy.uint16]:
+        """Get a flat numpy view of the raw buffer without copying it.
+        """
+        return numpy.frombuffer(self._buf, dtype=numpy.uint16)
 
-    def _check_line(self, i: int, pattern: str) -> bool:
-        """Check if the given line matches the given pattern.
+    def _palette(self, convert: Callable[[Color], T]) -> dict[int, T]:
+        """Convert each distinct color present on the frame.
 
-        The pattern can be shorter than the line.
-        In that case, only the line prefix is checked.
+        The result is a mapping of raw RGB565 values to converted values.
         """
-        pattern = ''.join(pattern.split())  # remove spaces
-        assert 0 < len(pattern) <= self._width
-        start = i * self._width
-        end = start + self._width
-        line = self._buf[start:end]
-        return all(act == exp for act, exp in zip(line, pattern))
+        return {c: convert(Color._from_rgb16(c)) for c in set(self._buf)}
 
+    def _format_line(self, line_no: int) -> str:
+        """Represent the given line as a pattern.
+        """
+        i = line_no * self._width
+        raw_line = self._buf[i:i+self._width]
+        return ''.join(_COLOR_TO_PAT.get(c, '*') for c in raw_line)
 
-def _write_chunk(out: BinaryIO, chunk_type: bytes, data: bytes) -> None:
-    """Write a PNG chunk.
 
-    https://en.wikipedia.org/wiki/PNG
-    """
-    assert len(chunk_type) == 4
-    out.write(struct.pack('>L', len(data)))
-    out.write(chunk_type)
-    out.write(data)
-    checksum = zlib.crc32(chunk_type)
-    checksum = zlib.crc32(data, checksum)
-    out.write(struct.pack('>L', checksum))
+def _require_numpy() -> None:
+    if not _HAS_NUMPY:
+        raise ImportError('numpy is required: pip install numpy')
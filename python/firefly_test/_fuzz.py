@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import random
+import time
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Final, Literal, Union
+
+from ._app import App, ExitedError, _parse_id
+from ._input import Input, Pad, _input_state
+from ._timeline import InputTimeline
+
+
+if TYPE_CHECKING:
+    from multiprocessing.process import BaseProcess
+
+
+Kind = Literal['error', 'crash', 'exit', 'hang']
+_Outcome = tuple[Union[Kind, None], str, int, list[bytes]]
+_Change = tuple[int, int, int, int]
+
+# The chance of the input changing on each generated update.
+CHANGE_RATE: Final = 1 / 20
+# The chance of generating a new case instead of mutating a known one.
+GENERATE_RATE: Final = 0.2
+# How many times a finding may be re-run when minimizing it.
+MINIMIZE_ATTEMPTS: Final = 200
+
+
+class Finding:
+    """A problem found by fuzz.
+
+    Attributes:
+        kind: "error" if the runtime failed, "crash" if the worker process
+            running the app died, "exit" if the app exited,
+            or "hang" if the app didn't finish the updates in time.
+        message: the error message.
+        timeline: the minimal found inputs reproducing the problem.
+            Replay it with App.replay.
+        path: where the timeline is saved, if fuzz got out_dir.
+    """
+    __slots__ = ('kind', 'message', 'path', 'timeline')
+    kind: Kind
+    message: str
+    timeline: InputTimeline
+    path: Path | None
+
+    def __init__(
+        self,
+        kind: Kind,
+        message: str,
+        timeline: InputTimeline,
+        path: Path | None = None,
+    ) -> None:
+        self.kind = kind
+        self.message = message
+        self.timeline = timeline
+        self.path = path
+
+    def __repr__(self) -> str:
+        name = type(self).__name__
+        return f'<{name} {self.kind} updates={len(self.timeline)} {self.message!r}>'
+
+
+def fuzz(
+    id: str | tuple[str, str],
+    vfs_path: Path | None = None,
+    *,
+    runs: int = 1000,
+    length: int = 600,
+    every: int = 10,
+    workers: int | None = None,
+    timeout: float = 10.0,
+    seed: int | None = None,
+    out_dir: Path | None = None,
+    allow_exit: bool = False,
+) -> list[Finding]:
+    """Run the app with random inputs, looking for crashes, exits, and hangs.
+
+    Each run starts a fresh app and replays on it a sequence of random
+    inputs, either generated from scratch or mutated from an earlier run.
+    The digests of frames the runs produce are remembered, and the runs
+    that reach frames not seen before are kept for further mutation.
+    So the fuzzer gradually explores new screens of the app.
+
+    The runs are distributed across worker processes. If a worker
+    doesn't finish a run in time, it's killed and the run is reported
+    as a hang. If a worker dies, the run is reported as a crash.
+    For other findings, the input sequence is minimized:
+    the fuzzer looks for the shortest sequence with the fewest input
+    changes that still reproduces the same problem.
+
+    Args:
+        id: the full ID of the app. For example, "lux.snek".
+        vfs_path: optional Path to the virtual FS root.
+        runs: how many input sequences to try.
+        length: how many updates to run for each input sequence.
+        every: check the frame after each that many updates.
+        workers: how many worker processes to use.
+            Defaults to the number of CPUs.
+        timeout: how many seconds a single run may take.
+        seed: the seed for the random number generator.
+        out_dir: if given, each finding is saved into this directory
+            as an InputTimeline in the text format.
+        allow_exit: if True, the app exiting is not reported.
+    """
+    author_id, app_id = _parse_id(id)
+    assert runs >= 0
+    assert length > 0
+    assert every > 0
+    if workers is None:
+        workers = os.cpu_count() or 1
+    assert workers > 0
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    session = _Session(length=length, seed=seed, out_dir=out_dir, timeout=timeout)
+    if allow_exit:
+        session.ignored = ('exit',)
+    pool = [
+        _Worker((author_id, app_id), vfs_path, every)
+        for _ in range(min(workers, max(runs, 1)))
+    ]
+    started = 0
+    try:
+        while True:
+            for worker in pool:
+                if worker.case is None and started < runs:
+                    worker.send(session.next_case(), timeout)
+                    started += 1
+            busy = [worker for worker in pool if worker.case is not None]
+            if not busy:
+                break
+            for worker in _wait(busy):
+                session.report(worker)
+    finally:
+        for worker in pool:
+            worker.close()
+    return list(session.findings.values())
+
+
+class _Session:
+    """The state of a single fuzz call: known inputs, frames, and findings.
+    """
+    __slots__ = (
+        'corpus',
+        'findings',
+        'ignored',
+        'length',
+        'out_dir',
+        'rng',
+        'seen',
+        'timeout',
+    )
+    length: int
+    rng: random.Random
+    out_dir: Path | None
+    timeout: float
+    ignored: tuple[Kind, ...]
+    corpus: list[InputTimeline]
+    seen: set[bytes]
+    findings: dict[tuple[Kind, str], Finding]
+
+    def __init__(
+        self, *,
+        length: int,
+        seed: int | None,
+        out_dir: Path | None,
+        timeout: float,
+    ) -> None:
+        self.length = length
+        self.rng = random.Random(seed)
+        self.out_dir = out_dir
+        self.timeout = timeout
+        self.ignored = ()
+        self.corpus = []
+        self.seen = set()
+        self.findings = {}
+
+    def next_case(self) -> InputTimeline:
+        """Generate new inputs or mutate the inputs that reached new frames.
+        """
+        if self.corpus and self.rng.random() > GENERATE_RATE:
+            case = self.rng.choice(self.corpus)
+            return _mutate(self.rng, case, self.length)
+        return _generate(self.rng, self.length)
+
+    def report(self, worker: _Worker) -> None:
+        """Collect the result of the worker's case.
+        """
+        case = worker.case
+        assert case is not None
+        kind, message, updates, digests = worker.recv(self.timeout)
+        if digests and not self.seen.issuperset(digests):
+            self.seen.update(digests)
+            self.corpus.append(case)
+        if kind is None or kind in self.ignored:
+            return
+        if (kind, message) in self.findings:
+            return
+        if kind != 'hang':
+            case = _minimize(worker, case[:updates], kind, message, self.timeout)
+        finding = Finding(kind, message, case)
+        if self.out_dir is not None:
+            finding.path = _save(self.out_dir, finding, len(self.findings))
+        self.findings[kind, message] = finding
+
+
+class _Worker:
+    """A worker process running the fuzzing cases.
+    """
+    __slots__ = ('_args', '_conn', '_process', 'case', 'deadline')
+    _args: tuple[tuple[str, str], Path | None, int]
+    _conn: Connection
+    _process: BaseProcess
+    case: InputTimeline | None
+    deadline: float
+
+    def __init__(self, id: tuple[str, str], vfs_path: Path | None, every: int) -> None:
+        self._args = (id, vfs_path, every)
+        self.case = None
+        self.deadline = 0.0
+        self._start()
+
+    def _start(self) -> None:
+        conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_serve,
+            args=(child_conn, *self._args),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self._conn = conn
+        self._process = process
+
+    def send(self, case: InputTimeline, timeout: float) -> None:
+        """Start running the case.
+        """
+        self.case = case
+        self.deadline = time.monotonic() + timeout
+        self._conn.send_bytes(case.to_bytes())
+
+    def recv(self, timeout: float) -> _Outcome:
+        """Get the result of the current case.
+
+        If the worker is stuck or died, it's restarted and the case
+        is reported as a hang or a crash respectively.
+        """
+        case = self.case
+        assert case is not None
+        self.case = None
+        if self._conn.poll(max(self.deadline - time.monotonic(), 0)):
+            try:
+                outcome: _Outcome = self._conn.recv()
+            except EOFError:
+                # The worker closed the pipe, so it must be exiting.
+                self._process.join(timeout)
+            else:
+                return outcome
+        exitcode = self._process.exitcode
+        self._restart()
+        if exitcode is not None:
+            message = f'the worker died with exit code {exitcode}'
+            return ('crash', message, len(case), [])
+        return ('hang', f'no response in {timeout} seconds', 0, [])
+
+    def run(self, case: InputTimeline, timeout: float) -> _Outcome:
+        """Run the case and wait for the result.
+        """
+        self.send(case, timeout)
+        return self.recv(timeout)
+
+    def _restart(self) -> None:
+        self._process.kill()
+        self._process.join()
+        self._conn.close()
+        self._start()
+
+    def close(self) -> None:
+        self._conn.close()
+        self._process.kill()
+        self._process.join()
+
+
+def _wait(busy: list[_Worker]) -> list[_Worker]:
+    """Wait for at least one worker to be done or to reach its deadline.
+    """
+    now = time.monotonic()
+    deadline = min(worker.deadline for worker in busy)
+    conns = [worker._conn for worker in busy]
+    ready = wait(conns, max(deadline - now, 0))
+    now = time.monotonic()
+    return [
+        worker for worker in busy
+        if worker._conn in ready or worker.deadline <= now
+    ]
+
+
+def _serve(  # pragma: no cover
+    conn: Connection,
+    id: tuple[str, str],
+    vfs_path: Path | None,
+    every: int,
+) -> None:
+    """Run cases received from the parent process, one at a time.
+    """
+    while True:
+        try:
+            data = conn.recv_bytes()
+        except EOFError:
+            return
+        case = InputTimeline.from_bytes(data)
+        conn.send(_execute(id, vfs_path, case, every))
+
+
+def _execute(
+    id: tuple[str, str],
+    vfs_path: Path | None,
+    case: InputTimeline,
+    every: int,
+) -> _Outcome:
+    """Run the case on a fresh app.
+
+    Returns the found problem (if any), the error message,
+    how many updates were run before the problem was detected,
+    and the digests of the checked frames.
+    """
+    digests: list[bytes] = []
+    updates = 0
+    try:
+        app = App(id, vfs_path)
+        app.start()
+        while updates < len(case):
+            chunk = case[updates:updates + every]
+            updates += len(chunk)
+            [frame] = app.replay(chunk)
+            digests.append(frame.digest())
+    except ExitedError:
+        return ('exit', 'the app exited', updates, digests)
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    # Rust panics are raised as PanicException which is a BaseException.
+    except BaseException as exc:
+        return ('error', f'{type(exc).__name__}: {exc}', updates, digests)
+    return (None, '', updates, digests)
+
+
+def _minimize(
+    worker: _Worker,
+    case: InputTimeline,
+    kind: Kind,
+    message: str,
+    timeout: float,
+) -> InputTimeline:
+    """Find the shortest inputs with the fewest changes reproducing the problem.
+    """
+    attempts = MINIMIZE_ATTEMPTS
+
+    def reproduces(candidate: InputTimeline) -> bool:
+        nonlocal attempts
+        if attempts <= 0:
+            return False
+        attempts -= 1
+        outcome = worker.run(candidate, timeout)
+        return outcome[:2] == (kind, message)
+
+    # Find the shortest prefix reproducing the problem.
+    low, high = 1, len(case)
+    while low < high:
+        mid = (low + high) // 2
+        if reproduces(case[:mid]):
+            high = mid
+        else:
+            low = mid + 1
+    case = case[:high]
+
+    # Drop the input changes not needed to reproduce the problem.
+    changes = case._changes()
+    for i in reversed(range(len(changes))):
+        candidate = changes[:i] + changes[i + 1:]
+        if reproduces(InputTimeline._from_changes(candidate, len(case))):
+            changes = candidate
+    return InputTimeline._from_changes(changes, len(case))
+
+
+def _generate(rng: random.Random, length: int) -> InputTimeline:
+    """Generate random inputs.
+    """
+    case = InputTimeline()
+    for _ in range(length):
+        if rng.random() < CHANGE_RATE:
+            case.record(_random_input(rng))
+        else:
+            case.record()
+    return case
+
+
+def _mutate(
+    rng: random.Random,
+    case: InputTimeline,
+    length: int,
+) -> InputTimeline:
+    """Randomly change, add, remove, or move a few input changes.
+    """
+    changes: dict[int, tuple[int, int, int]] = {
+        i: (x, y, b) for i, x, y, b in case._changes()
+    }
+    for _ in range(rng.randint(1, 4)):
+        op = rng.randrange(4)
+        if op == 0 or not changes:
+            index = rng.randrange(length)
+            changes[index] = _input_state(_random_input(rng))
+        elif op == 1:
+            del changes[rng.choice(list(changes))]
+        elif op == 2:
+            index = rng.choice(list(changes))
+            changes[index] = _input_state(_random_input(rng))
+        else:
+            index = rng.choice(list(changes))
+            new_index = min(max(index + rng.randint(-30, 30), 0), length - 1)
+            changes[new_index] = changes.pop(index)
+    items: list[_Change] = [(i, *state) for i, state in sorted(changes.items())]
+    return InputTimeline._from_changes(items, length)
+
+
+def _random_input(rng: random.Random) -> Input:
+    """Generate random pad and buttons state.
+
+    The menu button is never pressed: it only opens the system menu.
+    """
+    pad = None
+    if rng.random() < 0.5:
+        pad = Pad(rng.randint(-1000, 1000), rng.randint(-1000, 1000))
+    return Input(
+        pad,
+        s=rng.random() < 0.3,
+        e=rng.random() < 0.3,
+        w=rng.random() < 0.3,
+        n=rng.random() < 0.3,
+    )
+
+
+def _save(out_dir: Path, finding: Finding, index: int) -> Path:
+    """Save the finding inputs as a text timeline.
+    """
+    path = out_dir / f'{finding.kind}-{index:03}.txt'
+    header = ''.join(f'# {line}\n' for line in finding.message.splitlines())
+    path.write_text(f'# {finding.kind}\n{header}{finding.timeline.to_text()}')
+    return path
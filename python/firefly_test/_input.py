@@ -56,3 +56,11 @@ class Input:
         res = type(self)(pad)
         res._buttons = self._buttons | other._buttons
         return res
+
+
+def _input_state(input: Input | Pad) -> tuple[int, int, int]:
+    """Convert Input (or Pad) into (x, y, buttons) accepted by Runner.
+    """
+    if isinstance(input, Pad):
+        return (input._x, input._y, 0)
+    return (input._pad._x, input._pad._y, input._buttons)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator
+
+from ._color import PAT_TO_COLOR
+
+
+@dataclass(frozen=True)
+class _Line:
+    """A single compiled line of a pattern.
+    """
+
+    text: str
+    """The line as written in the pattern, used in the diff report.
+    """
+
+    width: int
+    """How many pixels the line covers, including "any color" ones.
+    """
+
+    runs: tuple[tuple[int, array[int]], ...]
+    """Continuous runs of concrete colors: offset and raw RGB565 values.
+
+    Pixels matching any color ('.') are not included, so each run
+    can be compared with a slice of a frame line in one go.
+    """
+
+
+class Pattern:
+    """An ASCII-art pattern compiled for matching against frames.
+
+    The text is parsed only once, when the Pattern is created.
+    Use `Pattern.compile` to reuse already compiled patterns.
+
+    See README for the list of supported symbols.
+    """
+    __slots__ = ('_lines', '_text')
+    _text: str
+    _lines: tuple[_Line, ...]
+
+    def __init__(self, text: str) -> None:
+        self._text = text
+        lines = [line.strip() for line in text.splitlines()]
+        self._lines = tuple(_compile_line(line) for line in lines if line)
+
+    @classmethod
+    def compile(cls, text: str) -> Pattern:
+        """Get a compiled pattern for the given text.
+
+        Compiled patterns are cached, so calling it again with the same text
+        doesn't parse the pattern again.
+        """
+        return _compile(text)
+
+    @property
+    def height(self) -> int:
+        """The number of (non-empty) lines in the pattern.
+        """
+        return len(self._lines)
+
+    def _check_lines(self, buf: array[int], width: int) -> Iterator[bool]:
+        """For each pattern line, check if it matches the frame buffer line.
+
+        The pattern lines can be shorter than the frame lines.
+        In that case, only the line prefix is checked.
+        """
+        for i, line in enumerate(self._lines):
+            assert 0 < line.width <= width
+            start = i * width
+            if start >= len(buf):
+                # Nothing to compare the line with.
+                yield True
+                continue
+            ok = True
+            for offset, values in line.runs:
+                run_start = start + offset
+                if buf[run_start:run_start + len(values)] != values:
+                    ok = False
+                    break
+            yield ok
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._text!r})'
+
+
+@lru_cache(maxsize=1024)
+def _compile(text: str) -> Pattern:
+    return Pattern(text)
+
+
+def _compile_line(text: str) -> _Line:
+    symbols = ''.join(text.split())  # remove spaces
+    runs: list[tuple[int, array[int]]] = []
+    run: array[int] | None = None
+    for i, symbol in enumerate(symbols):
+        if symbol == '.':
+            run = None
+            continue
+        try:
+            value = PAT_TO_COLOR[symbol]
+        except KeyError:
+            raise ValueError(f'unknown symbol in pattern: {symbol!r}') from None
+        if run is None:
+            run = array('H')
+            runs.append((i, run))
+        run.append(value)
+    return _Line(text=text, width=len(symbols), runs=tuple(runs))
@@ -0,0 +1,113 @@
+"""A minimal PNG encoder for frames.
+
+https://www.w3.org/TR/png-3/
+"""
+from __future__ import annotations
+
+import struct
+import zlib
+from typing import BinaryIO, Final
+
+
+try:
+    import numpy
+    _HAS_NUMPY = True
+except ImportError:
+    _HAS_NUMPY = False
+
+SIGNATURE: Final = b'\x89PNG\r\n\x1a\n'
+
+# Color types.
+TRUECOLOR: Final = 2
+INDEXED: Final = 3
+
+# Filter types.
+FILTER_NONE: Final = 0
+FILTER_SUB: Final = 1
+FILTER_UP: Final = 2
+
+
+def write_png(
+    stream: BinaryIO,
+    pixels: bytes,
+    *,
+    width: int,
+    height: int,
+    palette: bytes | None = None,
+) -> None:
+    """Write a PNG image.
+
+    If palette is given, it's a sequence of RGB triplets and each pixel
+    is 1 byte: the index of the color in the palette. Otherwise,
+    each pixel is 3 bytes: red, green, and blue.
+    """
+    color_type = TRUECOLOR if palette is None else INDEXED
+    bpp = 3 if palette is None else 1
+    stream.write(SIGNATURE)
+    header = struct.pack('>2LBBBBB', width, height, 8, color_type, 0, 0, 0)
+    _write_chunk(stream, b'IHDR', header)
+    if palette is not None:
+        _write_chunk(stream, b'PLTE', palette)
+    # Filters other than "none" rarely help for indexed images.
+    if palette is None and _HAS_NUMPY:
+        data = _filter_numpy(pixels, width * bpp, bpp)
+    else:
+        data = _filter_simple(pixels, width * bpp)
+    _write_chunk(stream, b'IDAT', zlib.compress(data))
+    _write_chunk(stream, b'IEND', b'')
+
+
+def _filter_simple(pixels: bytes, row_size: int) -> bytes:
+    """Add a filter type byte to each row.
+
+    Rows repeating the previous row use the "up" filter which turns them
+    into zeroes, all other rows are left unfiltered.
+    """
+    out = bytearray()
+    prev = None
+    zeroes = bytes(row_size)
+    for i in range(0, len(pixels), row_size):
+        row = pixels[i:i + row_size]
+        if row == prev:
+            out.append(FILTER_UP)
+            out.extend(zeroes)
+        else:
+            out.append(FILTER_NONE)
+            out.extend(row)
+        prev = row
+    return bytes(out)
+
+
+def _filter_numpy(pixels: bytes, row_size: int, bpp: int) -> bytes:
+    """Pick the best filter for each row.
+
+    It uses the heuristic recommended by the PNG spec: the filter
+    that gives the minimum sum of absolute (signed) byte values wins.
+    """
+    img = numpy.frombuffer(pixels, dtype=numpy.uint8).reshape(-1, row_size)
+    up = img.copy()
+    up[1:] -= img[:-1]
+    sub = img.copy()
+    sub[:, bpp:] -= img[:, :-bpp]
+    candidates = numpy.stack([img, sub, up])
+    signed = candidates.view(numpy.int8).astype(numpy.int16)
+    costs = numpy.abs(signed).sum(axis=2)
+    choice = costs.argmin(axis=0)
+    rows = candidates[choice, numpy.arange(len(img))]
+    filters = numpy.array([FILTER_NONE, FILTER_SUB, FILTER_UP], numpy.uint8)
+    out = numpy.hstack([filters[choice][:, None], rows])
+    return out.tobytes()
+
+
+def _write_chunk(out: BinaryIO, chunk_type: bytes, data: bytes) -> None:
+    """Write a PNG chunk.
+
+    https://en.wikipedia.org/wiki/PNG
+    """
+    assert len(chunk_type) == 4
+    out.write(struct.pack('>L', len(data)))
+    out.write(chunk_type)
+    out.write(data)
+    checksum = zlib.crc32(chunk_type)
+    checksum = zlib.crc32(data, checksum)
+    out.write(struct.pack('>L', checksum))
@@ -19,6 +19,11 @@ class Runner:
     Since it's kept in sync manually, type errors in the runtime are possible.
     However, having a stub like this helps to have semantic syntax highligting,
     autocomplete, and other static analysis goodies.
+
+    The methods running the app code (start, update) release the GIL,
+    so multiple Runners can run in parallel in different threads.
+    Calling a method of a Runner that is already busy in another thread
+    raises RuntimeError.
     """
 
     def __init__(
@@ -30,6 +35,7 @@ class Runner:
         """Initalizes the Runner and the wrapped Runtime.
 
         It includes reading and parsing wasm module, validating ROM, etc.
+        The GIL is released while it's running.
         """
         pass
 
@@ -39,8 +45,98 @@ class Runner:
     def update(self) -> bool:
         pass
 
-    def get_frame(self) -> list[int]:
+    def stats(self) -> tuple[int, float, float, float, float]:
+        """Get the number of updates, total update time, max update time,
+        total display flush time, and total frame copy time.
+        """
+        pass
+
+    def log_stats(self, enabled: bool) -> None:
+        """Enable or disable recording each update in the stats log.
+        """
+        pass
+
+    def take_stats_log(self) -> list[tuple[int, int, int, int]]:
+        """Get and clear the stats log: update index, update time (ns),
+        flush time (ns), and the number of changed rows.
+        """
+        pass
+
+    @property
+    def generation(self) -> int:
+        """Incremented by each call that might change the runtime state.
+        """
+        pass
+
+    def get_frame(self) -> bytes:
+        """Get a snapshot of the frame buffer.
+
+        Each pixel is a 2-bytes RGB565 value in the native byte order.
+        """
+        pass
+
+    @property
+    def tick(self) -> int:
+        """The number of started or updated cycles so far.
+        """
+        pass
+
+    def get_changed_rows(self, since: int) -> tuple[int, list[int], bytes]:
+        """Get the frame buffer rows changed after the given tick.
+
+        Returns the current tick, the row indices, and the rows
+        in the same format as get_frame.
+        """
+        pass
+
+    def frame_changed(self) -> bool:
+        """Check if any pixel was changed by the last update.
+        """
+        pass
+
+    def changed_regions(self) -> list[tuple[int, int, int, int]]:
+        """Get the boxes (x, y, width, height) changed by the last update.
+        """
+        pass
+
+    def get_pixel(self, x: int, y: int) -> int:
+        """Get the RGB565 value of a single pixel.
+        """
+        pass
+
+    def get_region(self, x: int, y: int, width: int, height: int) -> bytes:
+        """Get a region of the frame buffer, in the same format as get_frame.
+        """
         pass
 
     def set_input(self, x: int, y: int, b: int) -> None:
         pass
+
+    def run(
+        self,
+        n: int,
+        inputs: list[tuple[int, int, int, int]],
+        every: int,
+        last: bool,
+        render: bool,
+    ) -> tuple[list[tuple[int, bytes]], bool]:
+        """Run n update cycles in a single call.
+
+        Inputs are (update index, x, y, buttons) sorted by the update index.
+        If render is False, only captured frames and the last one are rendered.
+        Returns the list of (update index, frame) and if the app has exited.
+        """
+        pass
+
+    def wait_until(
+        self,
+        checks: list[tuple[int, int, int, int, list[int], int]],
+        max_frames: int,
+    ) -> tuple[int, bool, bool]:
+        """Run update cycles until the frame satisfies all the checks.
+
+        Each check is (x, y, width, height, RGB565 values, mode).
+        Returns how many updates were run, if the checks are satisfied,
+        and if the app has exited.
+        """
+        pass
@@ -0,0 +1,167 @@
+"""Binary serialization of frames used for snapshots.
+
+Format v2 (the current one) starts with a 12-bytes header:
+
+* 4 bytes: magic bytes, "FFZS".
+* 1 byte: format version, 2.
+* 1 byte: body encoding (see ENCODINGS).
+* 2 bytes: frame width.
+* 2 bytes: frame height.
+* 2 bytes: reserved, zeroes. Keeps the body aligned to 4 bytes.
+
+All numbers are little-endian. The header is followed by the body:
+
+* "raw": uncompressed RGB565 values, 2 bytes each.
+  Biggest but fastest to read.
+* "zlib": the same as "raw" but compressed with zlib.
+* "palette": zlib-compressed number of colors (2 bytes),
+  the colors (2 bytes each), and then the color index for each pixel
+  (1 byte each). Requires the frame to have at most 256 colors.
+* "rle": zlib-compressed run-length encoded pixels: pairs of
+  the run length (2 bytes) and the color (2 bytes).
+
+Format v1 (legacy, read-only) is a zlib-compressed frame width (2 bytes)
+followed by RGB565 values (2 bytes each).
+"""
+from __future__ import annotations
+
+import struct
+import sys
+import zlib
+from array import array
+from itertools import groupby
+from typing import Final, Literal, Mapping
+
+
+Encoding = Literal['auto', 'raw', 'zlib', 'palette', 'rle']
+
+MAGIC: Final = b'FFZS'
+VERSION: Final = 2
+ENCODINGS: Final[Mapping[str, int]] = {
+    'raw': 0,
+    'zlib': 1,
+    'palette': 2,
+    'rle': 3,
+}
+
+_HEADER: Final = struct.Struct('<4sBBHHxx')
+_BYTE_ORDER: Final = 'little'
+
+
+def encode(buf: array[int], width: int, encoding: Encoding = 'auto') -> bytes:
+    """Serialize the raw frame buffer.
+    """
+    if encoding == 'auto':
+        # Palette files are a bit smaller, but decoding them pixel by pixel
+        # in Python is many times slower than decompressing raw values.
+        encoding = 'zlib'
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        ENCODINGS[encoding],
+        width,
+        len(buf) // width,
+    )
+    if encoding == 'raw':
+        return header + pack(buf)
+    if encoding == 'zlib':
+        body = pack(buf)
+    elif encoding == 'palette':
+        colors = array('H', sorted(set(buf)))
+        if len(colors) > 256:
+            raise ValueError('palette encoding supports at most 256 colors')
+        index = {c: i for i, c in enumerate(colors)}
+        body = b''.join([
+            len(colors).to_bytes(2, _BYTE_ORDER),
+            pack(colors),
+            bytes(map(index.__getitem__, buf)),
+        ])
+    elif encoding == 'rle':
+        runs = array('H')
+        for color, group in groupby(buf):
+            runs.append(sum(1 for _ in group))
+            runs.append(color)
+        body = pack(runs)
+    else:
+        raise ValueError(f'unknown encoding: {encoding}')
+    return header + zlib.compress(body)
+
+
+def decode(data: bytes) -> tuple[array[int], int]:
+    """Deserialize the raw frame buffer and the frame width.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        return _decode_v1(data)
+    if len(data) < _HEADER.size:
+        raise ValueError('snapshot header is truncated')
+    _, version, encoding, width, height = _HEADER.unpack(data[:_HEADER.size])
+    if version != VERSION:
+        raise ValueError(f'unsupported snapshot version: {version}')
+    size = width * height
+    # Slice the body without copying it.
+    with memoryview(data) as view:
+        body = view[_HEADER.size:]
+        try:
+            if encoding == ENCODINGS['raw']:
+                if len(body) < size * 2:
+                    raise ValueError('snapshot size does not match its header')
+                buf = unpack(body[:size * 2])
+            else:
+                buf = _decode_body(_decompress(body), encoding)
+        finally:
+            body.release()
+    if len(buf) != size:
+        raise ValueError('snapshot size does not match its header')
+    return buf, width
+
+
+def _decode_body(body: bytes, encoding: int) -> array[int]:
+    if encoding == ENCODINGS['zlib']:
+        return unpack(body)
+    if encoding == ENCODINGS['palette']:
+        n_colors = int.from_bytes(body[:2], _BYTE_ORDER)
+        colors = unpack(body[2:2 + n_colors * 2])
+        indices = body[2 + n_colors * 2:]
+        return array('H', map(colors.__getitem__, indices))
+    if encoding == ENCODINGS['rle']:
+        runs = unpack(body)
+        buf = array('H')
+        for length, color in zip(runs[::2], runs[1::2]):
+            buf.extend(array('H', [color]) * length)
+        return buf
+    raise ValueError(f'unknown snapshot encoding: {encoding}')
+
+
+def _decompress(data: bytes | memoryview) -> bytes:
+    try:
+        return zlib.decompress(data)
+    except zlib.error as exc:
+        raise ValueError(f'corrupted snapshot: {exc}') from None
+
+
+def _decode_v1(data: bytes) -> tuple[array[int], int]:
+    decomp_bytes = _decompress(data)
+    width = int.from_bytes(decomp_bytes[:2], _BYTE_ORDER)
+    body = decomp_bytes[2:]
+    # Ignore the trailing incomplete pixel, if any.
+    body = body[:len(body) - len(body) % 2]
+    return unpack(body), width
+
+
+def pack(buf: array[int]) -> bytes:
+    """Convert RGB565 values into little-endian bytes.
+    """
+    if sys.byteorder != _BYTE_ORDER:
+        buf = array('H', buf)
+        buf.byteswap()
+    return buf.tobytes()
+
+
+def unpack(data: bytes | memoryview) -> array[int]:
+    """Convert little-endian bytes into RGB565 values.
+    """
+    buf = array('H')
+    buf.frombytes(data)
+    if sys.byteorder != _BYTE_ORDER:
+        buf.byteswap()
+    return buf
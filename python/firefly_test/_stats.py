@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Stats:
+    """Performance counters of an App runtime.
+
+    Returned by App.stats. All times are in seconds and cover
+    all update cycles run since the runtime was created.
+    """
+
+    updates: int
+    """How many update cycles were run.
+    """
+
+    update_time: float
+    """The total time spent in update cycles, including flushing frames.
+    """
+
+    max_update_time: float
+    """The longest single update cycle.
+    """
+
+    flush_time: float
+    """The time spent flushing frame buffers on the mock display.
+
+    Pixels drawn directly on the display, bypassing the frame buffer,
+    are not timed (the clock would have to be read for each primitive)
+    and count towards guest_time instead.
+    """
+
+    copy_time: float
+    """The time spent copying frames (or their parts) out of the runtime.
+    """
+
+    @property
+    def guest_time(self) -> float:
+        """The time spent in update cycles outside of the display.
+
+        That's mostly the app's update and render callbacks.
+        """
+        return self.update_time - self.flush_time
+
+    @property
+    def mean_update_time(self) -> float:
+        """The average time of a single update cycle.
+        """
+        if not self.updates:
+            return 0.0
+        return self.update_time / self.updates
+
+
+@dataclass(frozen=True)
+class FrameStats:
+    """Performance counters of a single update cycle.
+
+    Returned by App.stats_log.
+    """
+
+    update: int
+    """The index of the update cycle, starting from 0.
+    """
+
+    update_time: float
+    """The time spent in the update cycle, in seconds.
+    """
+
+    flush_time: float
+    """The time spent flushing the frame buffer on the mock display, in seconds.
+    """
+
+    changed_rows: int
+    """How many rows of the screen the update has changed.
+    """
+
+    @property
+    def guest_time(self) -> float:
+        """The time spent in the update cycle outside of the display.
+        """
+        return self.update_time - self.flush_time
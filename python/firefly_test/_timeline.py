@@ -0,0 +1,295 @@
+"""Compact input timelines.
+
+The binary format starts with a 12-bytes header:
+
+* 4 bytes: magic bytes, "FFZI".
+* 1 byte: format version, 1.
+* 3 bytes: reserved, zeroes.
+* 4 bytes: the number of updates in the timeline.
+
+It's followed by the zlib-compressed number of input changes (4 bytes)
+and the packed arrays of the change update indices (4 bytes each),
+pad X (2 bytes each), pad Y (2 bytes each), and buttons (1 byte each).
+All numbers are little-endian.
+
+The text format has the number of updates on the first line
+("updates N") and then one line for each input change: the update index,
+pad X, pad Y, and pressed buttons ("s", "e", "w", "n", "m" for menu,
+or "-" for none), separated by spaces. Lines starting with "#" are ignored.
+"""
+from __future__ import annotations
+
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Final, Iterable, Iterator, overload
+
+from ._input import Input, Pad, _input_state
+
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+MAGIC: Final = b'FFZI'
+VERSION: Final = 1
+BUTTONS: Final = 'sewnm'
+# The maximum absolute value of a pad coordinate, the same as for Pad.
+# The "no pad" value (255) is within the range too.
+PAD_MAX: Final = 1000
+
+_HEADER: Final = struct.Struct('<4sBxxxL')
+_COUNT: Final = struct.Struct('<L')
+_BYTE_ORDER: Final = 'little'
+
+
+class InputTimeline:
+    """Inputs for a sequence of updates stored in packed arrays.
+
+    Only the input changes are stored: the update index and the new
+    pad and buttons state. Each input stays active until overwritten,
+    the same as for App.update. So even hours of recorded gameplay
+    take just a few bytes for each button press.
+
+    Get the inputs an app has received from App.timeline,
+    save them with InputTimeline.write or InputTimeline.to_text,
+    and replay them later with App.replay in a single native call.
+    """
+    __slots__ = ('_buttons', '_length', '_updates', '_x', '_y')
+    _length: int
+    _updates: array[int]
+    _x: array[int]
+    _y: array[int]
+    _buttons: array[int]
+
+    def __init__(self) -> None:
+        self._length = 0
+        self._updates = array('I')
+        self._x = array('h')
+        self._y = array('h')
+        self._buttons = array('B')
+
+    @classmethod
+    def _from_changes(
+        cls,
+        changes: Iterable[tuple[int, int, int, int]],
+        length: int,
+    ) -> Self:
+        timeline = cls()
+        for index, x, y, b in changes:
+            if not 0 <= index < length:
+                raise ValueError('input change is out of the timeline')
+            if timeline._updates and index < timeline._updates[-1]:
+                raise ValueError('input changes are not sorted')
+            timeline._add(index, x, y, b)
+        timeline._length = length
+        return timeline
+
+    def record(self, input: Input | Pad | None = None) -> None:
+        """Add one update at the end of the timeline.
+
+        If input is given, it's set before the update.
+        Otherwise, the previous input stays active.
+        """
+        if input is not None:
+            self._add(self._length, *_input_state(input))
+        self._length += 1
+
+    def _add(self, index: int, x: int, y: int, b: int) -> None:
+        if self._updates:
+            assert index >= self._updates[-1]
+            if (self._x[-1], self._y[-1], self._buttons[-1]) == (x, y, b):
+                return
+            if index == self._updates[-1]:
+                self._x[-1], self._y[-1], self._buttons[-1] = x, y, b
+                return
+        self._updates.append(index)
+        self._x.append(x)
+        self._y.append(y)
+        self._buttons.append(b)
+
+    def changes(self) -> Iterator[tuple[int, Input]]:
+        """Iterate over the update indices where the input changes and new inputs.
+        """
+        for i, index in enumerate(self._updates):
+            yield index, self._input(i)
+
+    def _changes(self) -> list[tuple[int, int, int, int]]:
+        """Get the input changes in the format accepted by Runner.run.
+        """
+        return list(zip(self._updates, self._x, self._y, self._buttons))
+
+    def _input(self, i: int) -> Input:
+        input = Input(Pad(self._x[i], self._y[i]))
+        input._buttons = self._buttons[i]
+        return input
+
+    def __len__(self) -> int:
+        """The number of updates in the timeline.
+        """
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> Input | None:
+        pass
+
+    @overload
+    def __getitem__(self, index: slice) -> Self:
+        pass
+
+    def __getitem__(self, index: int | slice) -> Input | Self | None:
+        """Get the input active during the given update.
+
+        None if no input has been set yet.
+
+        If a slice is given, get a new timeline for the given range
+        of updates. The input active at the start of the range
+        is set on its first update.
+        """
+        if isinstance(index, slice):
+            return self._slice(index)
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('update index out of range')
+        i = bisect_right(self._updates, index)
+        if i == 0:
+            return None
+        return self._input(i - 1)
+
+    def _slice(self, index: slice) -> Self:
+        start, stop, step = index.indices(self._length)
+        if step != 1:
+            raise ValueError('input timeline slices do not support steps')
+        stop = max(start, stop)
+        first = max(bisect_right(self._updates, start) - 1, 0)
+        last = bisect_right(self._updates, stop - 1)
+        changes = [
+            (max(i - start, 0), x, y, b)
+            for i, x, y, b in self._changes()[first:last]
+        ]
+        return self._from_changes(changes, stop - start)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the timeline into the compact binary format.
+        """
+        header = _HEADER.pack(MAGIC, VERSION, self._length)
+        body = b''.join([
+            _COUNT.pack(len(self._updates)),
+            _pack(self._updates),
+            _pack(self._x),
+            _pack(self._y),
+            self._buttons.tobytes(),
+        ])
+        return header + zlib.compress(body)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Self:
+        """Deserialize a timeline serialized with InputTimeline.to_bytes.
+        """
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('not an input timeline')
+        if len(data) < _HEADER.size:
+            raise ValueError('input timeline header is truncated')
+        _, version, length = _HEADER.unpack(data[:_HEADER.size])
+        if version != VERSION:
+            raise ValueError(f'unsupported input timeline version: {version}')
+        try:
+            body = zlib.decompress(data[_HEADER.size:])
+        except zlib.error as exc:
+            raise ValueError(f'corrupted input timeline: {exc}') from None
+        if len(body) < _COUNT.size:
+            raise ValueError('input timeline size does not match its header')
+        (count,) = _COUNT.unpack(body[:_COUNT.size])
+        timeline = cls()
+        timeline._length = length
+        offset = _COUNT.size
+        for buf in (timeline._updates, timeline._x, timeline._y, timeline._buttons):
+            size = count * buf.itemsize
+            _unpack(buf, body[offset:offset + size])
+            offset += size
+        if offset != len(body) or len(timeline._buttons) != count:
+            raise ValueError('input timeline size does not match its header')
+        if count and timeline._updates[-1] >= length:
+            raise ValueError('input change is out of the timeline')
+        updates = timeline._updates
+        if any(a > b for a, b in zip(updates, updates[1:])):
+            raise ValueError('input changes are not sorted')
+        return timeline
+
+    @classmethod
+    def read(cls, stream: BinaryIO | Path) -> Self:
+        """Read from a file a timeline saved with InputTimeline.write.
+        """
+        if isinstance(stream, Path):
+            return cls.from_bytes(stream.read_bytes())
+        return cls.from_bytes(stream.read())
+
+    def write(self, stream: BinaryIO | Path) -> None:
+        """Save the timeline into a file in the compact binary format.
+        """
+        if isinstance(stream, Path):
+            stream.write_bytes(self.to_bytes())
+            return
+        stream.write(self.to_bytes())
+
+    def to_text(self) -> str:
+        """Serialize the timeline into the human-readable text format.
+        """
+        lines = [f'updates {self._length}']
+        for index, x, y, b in self._changes():
+            buttons = ''.join(s for i, s in enumerate(BUTTONS) if b & (1 << i))
+            lines.append(f'{index} {x} {y} {buttons or "-"}')
+        return '\n'.join(lines) + '\n'
+
+    @classmethod
+    def from_text(cls, text: str) -> Self:
+        """Parse a timeline serialized with InputTimeline.to_text.
+        """
+        lines = (line.strip() for line in text.splitlines())
+        lines = (line for line in lines if line and not line.startswith('#'))
+        header = next(lines, '').split()
+        if len(header) != 2 or header[0] != 'updates':
+            raise ValueError('input timeline must start with the number of updates')
+        changes = []
+        for line in lines:
+            index, x_str, y_str, buttons = line.split()
+            x, y = int(x_str), int(y_str)
+            if max(abs(x), abs(y)) > PAD_MAX:
+                raise ValueError(f'pad coordinates out of range: {x} {y}')
+            b = 0
+            if buttons != '-':
+                for symbol in buttons:
+                    pos = BUTTONS.find(symbol)
+                    if pos < 0:
+                        raise ValueError(f'unknown button: {symbol!r}')
+                    b |= 1 << pos
+            changes.append((int(index), x, y, b))
+        return cls._from_changes(changes, int(header[1]))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, InputTimeline):
+            return NotImplemented
+        return self._length == other._length and self._changes() == other._changes()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        name = type(self).__name__
+        return f'<{name} updates={self._length} changes={len(self._updates)}>'
+
+
+def _pack(buf: array[int]) -> bytes:
+    if sys.byteorder != _BYTE_ORDER:
+        buf = array(buf.typecode, buf)
+        buf.byteswap()
+    return buf.tobytes()
+
+
+def _unpack(buf: array[int], data: bytes) -> None:
+    buf.frombytes(data)
+    if sys.byteorder != _BYTE_ORDER:
+        buf.byteswap()
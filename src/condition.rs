@@ -0,0 +1,72 @@
+use firefly_runtime::{HEIGHT, WIDTH};
+
+/// A check of the frame buffer region made by `Runner::wait_until`.
+pub(crate) struct Check {
+    x: usize,
+    y: usize,
+    width: usize,
+    height: usize,
+    values: Vec<u16>,
+    mode: Mode,
+}
+
+enum Mode {
+    /// The region pixels are exactly the given values.
+    Equal,
+    /// At least one region pixel is not the same as the given value.
+    Differ,
+    /// At least one region pixel has one of the given colors.
+    Contains,
+    /// None of the region pixels has any of the given colors.
+    Lacks,
+}
+
+impl Check {
+    /// Validate and build the check from the raw values passed from Python.
+    pub fn new(raw: (usize, usize, usize, usize, Vec<u16>, u8)) -> Result<Self, String> {
+        let (x, y, width, height, values, mode) = raw;
+        let mode = match mode {
+            0 => Mode::Equal,
+            1 => Mode::Differ,
+            2 => Mode::Contains,
+            3 => Mode::Lacks,
+            _ => return Err(format!("unknown check mode: {mode}")),
+        };
+        if width == 0 || height == 0 {
+            return Err("the region is empty".to_string());
+        }
+        if x + width > WIDTH || y + height > HEIGHT {
+            return Err("the region is out of the frame".to_string());
+        }
+        if matches!(mode, Mode::Equal | Mode::Differ) && values.len() != width * height {
+            return Err("the values do not match the region size".to_string());
+        }
+        Ok(Self {
+            x,
+            y,
+            width,
+            height,
+            values,
+            mode,
+        })
+    }
+
+    /// Check if the frame buffer satisfies the check.
+    pub fn matches(&self, buf: &[u16]) -> bool {
+        match self.mode {
+            Mode::Equal => self.rows(buf).eq(self.values.chunks_exact(self.width)),
+            Mode::Differ => !self.rows(buf).eq(self.values.chunks_exact(self.width)),
+            Mode::Contains => self.rows(buf).flatten().any(|c| self.values.contains(c)),
+            Mode::Lacks => !self.rows(buf).flatten().any(|c| self.values.contains(c)),
+        }
+    }
+
+    /// Iterate over the lines of the checked region of the frame buffer.
+    fn rows<'a>(&self, buf: &'a [u16]) -> impl Iterator<Item = &'a [u16]> {
+        let (x, width) = (self.x, self.width);
+        (self.y..self.y + self.height).map(move |y| {
+            let start = y * WIDTH + x;
+            &buf[start..start + width]
+        })
+    }
+}
@@ -3,17 +3,124 @@ use embedded_graphics::primitives::Rectangle;
 use embedded_graphics::Pixel;
 use firefly_runtime::*;
 use std::convert::Infallible;
+use std::time::{Duration, Instant};
 
 const BUF_SIZE: usize = WIDTH * HEIGHT;
 
 pub(crate) struct MockDisplay {
     /// The frame buffer for the display. One value is a serialized RGB value.
     pub buf: [u16; BUF_SIZE],
+
+    /// If true, all drawing on the display is ignored.
+    ///
+    /// Used for fast-forwarding through frames nobody is going to look at.
+    pub skip: bool,
+
+    /// Incremented by the runner before each update.
+    pub tick: u64,
+
+    /// The time spent flushing frame buffers on the display
+    /// since the runner last reset it. Only `render_fb` is timed.
+    pub flush_time: Duration,
+
+    /// For each row, the tick at which a pixel in the row was last changed.
+    row_ticks: [u64; HEIGHT],
+
+    /// For each row, the first and the last changed pixel (inclusive)
+    /// during the tick at which the row was last changed.
+    row_spans: [(usize, usize); HEIGHT],
 }
 
 impl MockDisplay {
     pub fn new() -> Self {
-        Self { buf: [0; BUF_SIZE] }
+        Self {
+            buf: [0; BUF_SIZE],
+            skip: false,
+            tick: 0,
+            flush_time: Duration::ZERO,
+            row_ticks: [0; HEIGHT],
+            row_spans: [(0, 0); HEIGHT],
+        }
+    }
+
+    /// Set the pixel value and, if it's different, mark the row as changed.
+    fn set_pixel(&mut self, x: usize, y: usize, value: u16) {
+        let i = y * WIDTH + x;
+        if self.buf[i] == value {
+            return;
+        }
+        self.buf[i] = value;
+        if self.row_ticks[y] == self.tick {
+            let (start, end) = self.row_spans[y];
+            self.row_spans[y] = (start.min(x), end.max(x));
+        } else {
+            self.row_ticks[y] = self.tick;
+            self.row_spans[y] = (x, x);
+        }
+    }
+
+    /// Iterate over the indices of rows changed after the given tick.
+    pub fn changed_rows(&self, since: u64) -> impl Iterator<Item = usize> + '_ {
+        (0..HEIGHT).filter(move |&y| self.row_ticks[y] > since)
+    }
+
+    /// Get the bounding boxes (x, y, width, height) of the changes made
+    /// during the current tick. Consecutive changed rows are merged.
+    pub fn changed_regions(&self) -> Vec<(usize, usize, usize, usize)> {
+        let mut regions: Vec<(usize, usize, usize, usize)> = Vec::new();
+        let mut prev_row = None;
+        for y in self.changed_rows(self.tick.saturating_sub(1)) {
+            let (start, end) = self.row_spans[y];
+            match regions.last_mut() {
+                Some(region) if prev_row == Some(y - 1) => {
+                    let left = region.0.min(start);
+                    let right = (region.0 + region.2).max(end + 1);
+                    *region = (left, region.1, right - left, region.3 + 1);
+                }
+                _ => regions.push((start, y, end + 1 - start, 1)),
+            }
+            prev_row = Some(y);
+        }
+        regions
+    }
+
+    /// Check if any pixel was changed during the current tick.
+    pub fn changed(&self) -> bool {
+        self.changed_rows(self.tick.saturating_sub(1)).next().is_some()
+    }
+
+    /// Copy the given rows of the frame buffer into the given bytes
+    /// using the native byte order.
+    pub fn write_rows_bytes(&self, rows: &[usize], out: &mut [u8]) {
+        for (&y, out_row) in rows.iter().zip(out.chunks_exact_mut(WIDTH * 2)) {
+            let pixels = &self.buf[y * WIDTH..(y + 1) * WIDTH];
+            for (chunk, pixel) in out_row.chunks_exact_mut(2).zip(pixels) {
+                chunk.copy_from_slice(&pixel.to_ne_bytes());
+            }
+        }
+    }
+
+    /// Copy the frame buffer into the given bytes using the native byte order.
+    ///
+    /// The output must be exactly twice as long as the frame buffer.
+    pub fn write_bytes(&self, out: &mut [u8]) {
+        for (chunk, pixel) in out.chunks_exact_mut(2).zip(self.buf.iter()) {
+            chunk.copy_from_slice(&pixel.to_ne_bytes());
+        }
+    }
+
+    /// Copy a region of the frame buffer into the given bytes using the native byte order.
+    ///
+    /// The region must be within the frame and the output must be exactly
+    /// twice as long as the number of pixels in the region.
+    pub fn write_region_bytes(&self, x: usize, y: usize, width: usize, out: &mut [u8]) {
+        for (row, out_row) in out.chunks_exact_mut(width * 2).enumerate() {
+            let start = (y + row) * WIDTH + x;
+            let pixels = &self.buf[start..start + width];
+            for (chunk, pixel) in out_row.chunks_exact_mut(2).zip(pixels) {
+                chunk.copy_from_slice(&pixel.to_ne_bytes());
+            }
+        }
     }
 }
 
@@ -31,9 +138,14 @@ impl DrawTarget for MockDisplay {
     where
         I: IntoIterator<Item = Pixel<Self::Color>>,
     {
+        if self.skip {
+            return Ok(());
+        }
+        // Not timed: it may be called for every drawn primitive,
+        // and reading the clock each time would slow down every app.
         for Pixel(point, color) in pixels {
-            let i = point.y as usize * WIDTH + point.x as usize;
-            self.buf[i] = (u16::from(color.0) << 8) | u16::from(color.1);
+            let value = (u16::from(color.0) << 8) | u16::from(color.1);
+            self.set_pixel(point.x as usize, point.y as usize, value);
         }
         Ok(())
     }
@@ -43,12 +155,17 @@ impl RenderFB for MockDisplay {
     type Error = Infallible;
 
     fn render_fb(&mut self, frame: &mut FrameBuffer) -> Result<(), Self::Error> {
+        if self.skip {
+            return Ok(());
+        }
+        let started = Instant::now();
         let bbox = Rectangle::new(Point::zero(), frame.size());
         let pixels: Vec<Rgb16> = frame.iter_pairs().flat_map(|(a, b)| [a, b]).collect();
         for (point, color) in bbox.points().zip(pixels) {
-            let i = point.y as usize * WIDTH + point.x as usize;
-            self.buf[i] = (u16::from(color.0) << 8) | u16::from(color.1);
+            let value = (u16::from(color.0) << 8) | u16::from(color.1);
+            self.set_pixel(point.x as usize, point.y as usize, value);
         }
+        self.flush_time += started.elapsed();
         Ok(())
     }
 }
@@ -1,7 +1,9 @@
 mod color;
+mod condition;
 mod display;
 mod runner;
 mod runtime;
+mod stats;
 use pyo3::prelude::*;
 
 /// Framework for testing Firefly Zero games.
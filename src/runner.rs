@@ -1,95 +1,386 @@
+use crate::condition::Check;
 use crate::display::MockDisplay;
-use crate::runtime::{get_runtime, set_runtime};
+use crate::runtime::{MockRuntime, RealRuntime};
+use crate::stats::Stats;
 use directories::ProjectDirs;
 use firefly_hal::*;
 use firefly_runtime::*;
-use pyo3::exceptions::{PyRuntimeError, PyTypeError};
+use pyo3::exceptions::{PyRuntimeError, PyTypeError, PyValueError};
 use pyo3::prelude::*;
+use pyo3::types::PyBytes;
 use std::path::PathBuf;
+use std::time::{Duration, Instant};
 
-#[pyclass(unsendable)]
-pub struct Runner {}
+/// How often the app renders frames when rendering is skipped.
+///
+/// The runtime has no way to disable rendering completely,
+/// so we ask it to render as rarely as possible.
+const RENDER_RARELY: u8 = u8::MAX;
+
+/// The Runner is Send and Sync, so it can be used from multiple Python threads.
+///
+/// The GIL is released while the guest code is running. PyO3 borrow checks
+/// guarantee that only one thread at a time can access the wrapped runtime.
+#[pyclass]
+pub struct Runner {
+    runtime: MockRuntime<'static>,
+
+    /// Incremented each time the runtime state might have changed.
+    ///
+    /// Lets Python know if the frame it has already copied is still valid.
+    generation: u64,
+
+    /// Performance counters.
+    stats: Stats,
+}
 
 #[pymethods]
 impl Runner {
+    /// Create the Runner and the wrapped Runtime.
+    ///
+    /// The GIL is released while the app is loaded and compiled,
+    /// so other Python threads can run in the meantime.
     #[new]
-    fn new(author_id: String, app_id: String, vfs_path: String) -> PyResult<Self> {
-        let vfs_path: PathBuf = if vfs_path.is_empty() {
-            get_vfs_path()
-        } else {
-            vfs_path.into()
-        };
-        let config = DeviceConfig {
-            root: vfs_path,
-            ..Default::default()
-        };
-        let device = DeviceImpl::new(config);
+    fn new(py: Python<'_>, author_id: String, app_id: String, vfs_path: String) -> PyResult<Self> {
         let Some(id) = FullID::from_str(author_id.as_str(), app_id.as_str()) else {
             return Err(PyTypeError::new_err("invalid author/app ID"));
         };
-        let display = MockDisplay::new();
-        let config = RuntimeConfig {
-            id: Some(id),
-            device,
-            display,
-            net_handler: NetHandler::None,
-        };
-        let runtime = match Runtime::new(config) {
-            Ok(runtime) => runtime,
-            Err(err) => make_error(&err.to_string())?,
-        };
-
-        let res = set_runtime(runtime);
-        if let Err(err) = res {
-            make_error(err)?;
+        let res = py.detach(move || make_runtime(id, vfs_path));
+        match res {
+            Ok(runtime) => Ok(Self {
+                runtime,
+                generation: 0,
+                stats: Stats::default(),
+            }),
+            Err(err) => make_error(&err),
         }
-        Ok(Self {})
     }
 
-    fn start(&mut self) -> PyResult<()> {
-        let runtime = match get_runtime() {
-            Ok(runtime) => runtime,
-            Err(err) => make_error(err)?,
-        };
-        match runtime.start() {
+    fn start(&mut self, py: Python<'_>) -> PyResult<()> {
+        self.generation += 1;
+        let runtime = &mut self.runtime;
+        let res = py.detach(move || {
+            let runtime = runtime.get();
+            runtime.display_mut().tick += 1;
+            runtime.start().map_err(|err| err.to_string())
+        });
+        match res {
             Ok(()) => Ok(()),
-            Err(err) => Err(PyRuntimeError::new_err(err.to_string())),
+            Err(err) => Err(PyRuntimeError::new_err(err)),
         }
     }
 
-    fn update(&mut self) -> PyResult<bool> {
-        let runtime = match get_runtime() {
-            Ok(runtime) => runtime,
-            Err(err) => make_error(err)?,
-        };
-        runtime.set_render_every(1);
-        match runtime.update() {
+    fn update(&mut self, py: Python<'_>) -> PyResult<bool> {
+        self.generation += 1;
+        let runtime = &mut self.runtime;
+        let stats = &mut self.stats;
+        let res = py.detach(move || {
+            let runtime = runtime.get();
+            set_render(runtime, true);
+            tick_update(runtime, stats)
+        });
+        match res {
             Ok(exit) => Ok(exit),
-            Err(err) => Err(PyRuntimeError::new_err(err.to_string())),
+            Err(err) => Err(PyRuntimeError::new_err(err)),
         }
     }
 
-    fn get_frame(&mut self) -> PyResult<Vec<u16>> {
-        let runtime = match get_runtime() {
-            Ok(runtime) => runtime,
-            Err(err) => make_error(err)?,
-        };
-        Ok(runtime.display_mut().buf.into())
+    /// Get the performance counters.
+    ///
+    /// Returns the number of updates and, in seconds, the total update time,
+    /// the longest update time, the total time spent drawing on the display,
+    /// and the total time spent copying frames out of the display.
+    fn stats(&self) -> (u64, f64, f64, f64, f64) {
+        let stats = &self.stats;
+        (
+            stats.updates,
+            stats.update_time.as_secs_f64(),
+            stats.max_update_time.as_secs_f64(),
+            stats.flush_time.as_secs_f64(),
+            stats.copy_time.as_secs_f64(),
+        )
+    }
+
+    /// Enable or disable recording each update in the stats log.
+    fn log_stats(&mut self, enabled: bool) {
+        self.stats.logging = enabled;
+    }
+
+    /// Get and clear the stats log.
+    ///
+    /// Each record is the update index, the update time (ns),
+    /// the time spent drawing on the display (ns), and the number of changed rows.
+    fn take_stats_log(&mut self) -> Vec<(u64, u64, u64, usize)> {
+        std::mem::take(&mut self.stats.log)
+    }
+
+    /// The number of calls that could have changed the runtime state so far.
+    #[getter]
+    fn generation(&self) -> u64 {
+        self.generation
+    }
+
+    /// Get a snapshot of the frame buffer as bytes.
+    ///
+    /// Each pixel is a 2-bytes RGB565 value in the native byte order,
+    /// so the result can be wrapped in Python by `array('H')` as is.
+    fn get_frame<'py>(&mut self, py: Python<'py>) -> PyResult<Bound<'py, PyBytes>> {
+        let started = Instant::now();
+        let runtime = self.runtime.get();
+        let display: &MockDisplay = runtime.display_mut();
+        let res = PyBytes::new_with(py, display.buf.len() * 2, |out| {
+            py.detach(|| display.write_bytes(out));
+            Ok(())
+        });
+        self.stats.copy_time += started.elapsed();
+        res
+    }
+
+    /// The number of the display ticks (started or updated cycles) so far.
+    #[getter]
+    fn tick(&mut self) -> u64 {
+        self.runtime.get().display_mut().tick
+    }
+
+    /// Get the rows of the frame buffer changed after the given tick.
+    ///
+    /// Returns the current tick, the indices of the changed rows,
+    /// and the changed rows as bytes in the same format as `get_frame`.
+    fn get_changed_rows<'py>(
+        &mut self,
+        py: Python<'py>,
+        since: u64,
+    ) -> PyResult<(u64, Vec<usize>, Bound<'py, PyBytes>)> {
+        let started = Instant::now();
+        let runtime = self.runtime.get();
+        let display: &MockDisplay = runtime.display_mut();
+        let rows: Vec<usize> = display.changed_rows(since).collect();
+        let data = PyBytes::new_with(py, rows.len() * WIDTH * 2, |out| {
+            display.write_rows_bytes(&rows, out);
+            Ok(())
+        })?;
+        let tick = display.tick;
+        self.stats.copy_time += started.elapsed();
+        Ok((tick, rows, data))
+    }
+
+    /// Check if any pixel was changed by the last update.
+    fn frame_changed(&mut self) -> bool {
+        self.runtime.get().display_mut().changed()
+    }
+
+    /// Get the bounding boxes (x, y, width, height) of the changes made
+    /// by the last update. Consecutive changed rows are merged.
+    fn changed_regions(&mut self) -> Vec<(usize, usize, usize, usize)> {
+        self.runtime.get().display_mut().changed_regions()
+    }
+
+    /// Get the RGB565 value of a single pixel of the frame buffer.
+    fn get_pixel(&mut self, x: usize, y: usize) -> PyResult<u16> {
+        if x >= WIDTH || y >= HEIGHT {
+            return Err(PyValueError::new_err("the pixel is out of the frame"));
+        }
+        let runtime = self.runtime.get();
+        Ok(runtime.display_mut().buf[y * WIDTH + x])
+    }
+
+    /// Get a snapshot of a region of the frame buffer as bytes.
+    ///
+    /// The same as `get_frame` but only the requested rectangle is copied.
+    fn get_region<'py>(
+        &mut self,
+        py: Python<'py>,
+        x: usize,
+        y: usize,
+        width: usize,
+        height: usize,
+    ) -> PyResult<Bound<'py, PyBytes>> {
+        if width == 0 || height == 0 || x + width > WIDTH || y + height > HEIGHT {
+            return Err(PyValueError::new_err("the region is out of the frame"));
+        }
+        let started = Instant::now();
+        let runtime = self.runtime.get();
+        let display: &MockDisplay = runtime.display_mut();
+        let res = PyBytes::new_with(py, width * height * 2, |out| {
+            display.write_region_bytes(x, y, width, out);
+            Ok(())
+        });
+        self.stats.copy_time += started.elapsed();
+        res
     }
 
     fn set_input(&mut self, x: i16, y: i16, b: u8) -> PyResult<()> {
-        let pad = if x == 0xFF && y == 0xFF {
-            None
-        } else {
-            Some(Pad { x, y })
+        self.generation += 1;
+        let runtime = self.runtime.get();
+        runtime.device_mut().update_input(make_input(x, y, b));
+        Ok(())
+    }
+
+    /// Run multiple update cycles in a single call.
+    ///
+    /// The `inputs` is a list of (update index, x, y, buttons) sorted
+    /// by the update index. Each input is set right before the update
+    /// with the given index and stays active until overwritten.
+    ///
+    /// The frame is captured after every `every`-th update (unless it's 0)
+    /// and after the last update if `last` is true.
+    ///
+    /// If `render` is false, the app renders only the captured frames
+    /// and the last one. The rest of the updates run only the update logic.
+    ///
+    /// Returns the list of (update index, frame) for captured frames
+    /// and a flag indicating if the app has exited. If it has, the
+    /// remaining updates are skipped.
+    #[allow(clippy::type_complexity)]
+    fn run<'py>(
+        &mut self,
+        py: Python<'py>,
+        n: u32,
+        inputs: Vec<(u32, i16, i16, u8)>,
+        every: u32,
+        last: bool,
+        render: bool,
+    ) -> PyResult<(Vec<(u32, Bound<'py, PyBytes>)>, bool)> {
+        self.generation += 1;
+        let runtime = &mut self.runtime;
+        let stats = &mut self.stats;
+        let res = py.detach(move || -> Result<(Vec<(u32, Vec<u8>)>, bool), String> {
+            let runtime = runtime.get();
+            let mut inputs = inputs.into_iter().peekable();
+            let mut frames = Vec::new();
+            for i in 0..n {
+                while let Some((_, x, y, b)) = inputs.next_if(|input| input.0 <= i) {
+                    runtime.device_mut().update_input(make_input(x, y, b));
+                }
+                let is_last = i + 1 == n;
+                let capture = (every != 0 && (i + 1) % every == 0) || (last && is_last);
+                set_render(runtime, render || capture || is_last);
+                let exit = tick_update(runtime, stats)?;
+                if capture {
+                    let started = Instant::now();
+                    let display = runtime.display_mut();
+                    let mut frame = vec![0; display.buf.len() * 2];
+                    display.write_bytes(&mut frame);
+                    frames.push((i, frame));
+                    stats.copy_time += started.elapsed();
+                }
+                if exit {
+                    return Ok((frames, true));
+                }
+            }
+            Ok((frames, false))
+        });
+        let (frames, exit) = match res {
+            Ok(res) => res,
+            Err(err) => return Err(PyRuntimeError::new_err(err)),
         };
-        let input = InputState { pad, buttons: b };
-        let runtime = match get_runtime() {
-            Ok(runtime) => runtime,
-            Err(err) => make_error(err)?,
+        let frames = frames
+            .into_iter()
+            .map(|(i, frame)| (i, PyBytes::new(py, &frame)))
+            .collect();
+        Ok((frames, exit))
+    }
+
+    /// Run update cycles until the frame satisfies all the checks.
+    ///
+    /// The checks are evaluated after each update without copying
+    /// the frame buffer. Each check is a tuple of the region (x, y, width,
+    /// height), the RGB565 values to compare the region with, and the mode.
+    ///
+    /// Returns how many updates were run, a flag indicating if all the checks
+    /// were satisfied, and a flag indicating if the app has exited.
+    #[allow(clippy::type_complexity)]
+    fn wait_until(
+        &mut self,
+        py: Python<'_>,
+        checks: Vec<(usize, usize, usize, usize, Vec<u16>, u8)>,
+        max_frames: u32,
+    ) -> PyResult<(u32, bool, bool)> {
+        let checks: Vec<Check> = match checks.into_iter().map(Check::new).collect() {
+            Ok(checks) => checks,
+            Err(err) => return Err(PyValueError::new_err(err)),
         };
-        runtime.device_mut().update_input(input);
-        Ok(())
+        self.generation += 1;
+        let runtime = &mut self.runtime;
+        let stats = &mut self.stats;
+        let res = py.detach(move || -> Result<(u32, bool, bool), String> {
+            let runtime = runtime.get();
+            set_render(runtime, true);
+            for i in 1..=max_frames {
+                let exit = tick_update(runtime, stats)?;
+                let display = runtime.display_mut();
+                // If nothing has changed, the checks will fail again.
+                let changed = i == 1 || display.changed();
+                if changed && checks.iter().all(|check| check.matches(&display.buf)) {
+                    return Ok((i, true, exit));
+                }
+                if exit {
+                    return Ok((i, false, true));
+                }
+            }
+            Ok((max_frames, false, false))
+        });
+        match res {
+            Ok(res) => Ok(res),
+            Err(err) => Err(PyRuntimeError::new_err(err)),
+        }
+    }
+}
+
+/// Run a single update cycle, counting it in the display ticks and stats.
+fn tick_update(runtime: &mut RealRuntime<'static>, stats: &mut Stats) -> Result<bool, String> {
+    let display = runtime.display_mut();
+    display.tick += 1;
+    display.flush_time = Duration::ZERO;
+    let started = Instant::now();
+    let res = runtime.update();
+    let update_time = started.elapsed();
+    let display = runtime.display_mut();
+    let changed = display.changed_rows(display.tick - 1).count();
+    stats.record(update_time, display.flush_time, changed);
+    res.map_err(|err| err.to_string())
+}
+
+/// Enable or disable (as much as possible) rendering for the next updates.
+fn set_render(runtime: &mut RealRuntime<'static>, render: bool) {
+    if render {
+        runtime.set_render_every(1);
+    } else {
+        runtime.set_render_every(RENDER_RARELY.into());
+    }
+    runtime.display_mut().skip = !render;
+}
+
+fn make_input(x: i16, y: i16, b: u8) -> InputState {
+    let pad = if x == 0xFF && y == 0xFF {
+        None
+    } else {
+        Some(Pad { x, y })
+    };
+    InputState { pad, buttons: b }
+}
+
+fn make_runtime(id: FullID, vfs_path: String) -> Result<MockRuntime<'static>, String> {
+    let vfs_path: PathBuf = if vfs_path.is_empty() {
+        get_vfs_path()
+    } else {
+        vfs_path.into()
+    };
+    let config = DeviceConfig {
+        root: vfs_path,
+        ..Default::default()
+    };
+    let device = DeviceImpl::new(config);
+    let display = MockDisplay::new();
+    let config = RuntimeConfig {
+        id: Some(id),
+        device,
+        display,
+        net_handler: NetHandler::None,
+    };
+    match Runtime::new(config) {
+        Ok(runtime) => Ok(MockRuntime::new(runtime)),
+        Err(err) => Err(err.to_string()),
     }
 }
 
@@ -1,42 +1,13 @@
 use crate::display::MockDisplay;
 use firefly_runtime::{Rgb16, Runtime};
-use std::sync::Mutex;
 
-type RealRuntime<'a> = Runtime<'a, MockDisplay, Rgb16>;
+pub type RealRuntime<'a> = Runtime<'a, MockDisplay, Rgb16>;
 
-/// A global Runtime instance.
+/// A wrapper for Runtime implementing Send and Sync.
 ///
-/// We have to store the Runtime globally to have 'static runtime for it.
-static mut RUNTIME: Mutex<Option<MockRuntime>> = Mutex::new(None);
-
-pub fn set_runtime(runtime: RealRuntime<'static>) -> Result<(), &'static str> {
-    unsafe {
-        let runtime = MockRuntime::new(runtime);
-        #[allow(static_mut_refs)]
-        let Ok(mut cell) = RUNTIME.lock() else {
-            return Err("lock is poisoned");
-        };
-        cell.replace(runtime);
-        Ok(())
-    }
-}
-
-pub fn get_runtime<'a>() -> Result<&'a mut RealRuntime<'static>, &'static str> {
-    unsafe {
-        #[allow(static_mut_refs)]
-        let Ok(runtime) = RUNTIME.get_mut() else {
-            return Err("lock is poisoned");
-        };
-        let Some(runtime) = runtime.as_mut() else {
-            return Err("runtime is not initialized");
-        };
-        Ok(&mut runtime.runtime)
-    }
-}
-
-/// An unsafe wrapper for Runtime implementing Send and Sync.
-///
-/// Required for storing Runtime in a global static.
+/// Each Runner owns its own Runtime, so multiple apps can run
+/// side by side in the same process without affecting each other.
+/// See the safety notes below for why the Runtime may move between threads.
 pub struct MockRuntime<'a> {
     runtime: RealRuntime<'a>,
 }
@@ -45,7 +16,25 @@ impl<'a> MockRuntime<'a> {
     pub fn new(runtime: RealRuntime<'a>) -> Self {
         Self { runtime }
     }
+
+    pub fn get(&mut self) -> &mut RealRuntime<'a> {
+        &mut self.runtime
+    }
 }
 
+// SAFETY: The Runtime is self-contained. `make_runtime` builds it
+// from values it takes ownership of (the device, the MockDisplay, and
+// the config without networking), and each Runtime is owned by exactly
+// one MockRuntime. Nothing outside of it holds references into it. So any
+// non-Send parts inside of it (like Rc or RefCell) point only into the same
+// Runtime and always move between threads together with it. MockDisplay
+// is plain data. This relies on firefly-runtime not keeping the runtime
+// state in thread-locals and not holding thread-affine OS handles.
+// Re-check that when upgrading firefly-runtime.
 unsafe impl<'a> Send for MockRuntime<'a> {}
+
+// SAFETY: MockRuntime gives access to the Runtime only through `get`,
+// which requires `&mut self`. So a shared reference can't be used to touch
+// the Runtime, and PyO3 borrow checks on Runner guarantee that only one
+// thread at a time holds the mutable one.
 unsafe impl<'a> Sync for MockRuntime<'a> {}
@@ -0,0 +1,45 @@
+use std::time::Duration;
+
+/// Performance counters collected by the Runner.
+#[derive(Default)]
+pub(crate) struct Stats {
+    /// How many update cycles were run.
+    pub updates: u64,
+
+    /// The total time spent in update cycles, including flushing frames.
+    pub update_time: Duration,
+
+    /// The longest single update cycle.
+    pub max_update_time: Duration,
+
+    /// The total time spent flushing frame buffers on the mock display.
+    pub flush_time: Duration,
+
+    /// The total time spent copying frames out of the display.
+    pub copy_time: Duration,
+
+    /// If true, each update is also recorded in the log.
+    pub logging: bool,
+
+    /// For each update: the update index, the update time (ns),
+    /// the flush time (ns), and the number of changed rows.
+    pub log: Vec<(u64, u64, u64, usize)>,
+}
+
+impl Stats {
+    /// Add a single update cycle to the counters.
+    pub fn record(&mut self, update_time: Duration, flush_time: Duration, changed: usize) {
+        if self.logging {
+            self.log.push((
+                self.updates,
+                update_time.as_nanos() as u64,
+                flush_time.as_nanos() as u64,
+                changed,
+            ));
+        }
+        self.updates += 1;
+        self.update_time += update_time;
+        self.max_update_time = self.max_update_time.max(update_time);
+        self.flush_time += flush_time;
+    }
+}
@@ -1,4 +1,9 @@
+import copy
+import pickle
+
+import pytest
 from firefly_test import Color
+from firefly_test._color import _rgb24_to_rgb16
 
 
 def test_eq() -> None:
@@ -46,6 +51,14 @@ def test_rgb() -> None:
     assert 0.97 <= c.rgb[2] <= 1.00
 
 
+def test_colorsys_cached() -> None:
+    c = Color.from_rgb24(0x3B5DC9)
+    assert c.hls is c.hls
+    assert c.hsv is c.hsv
+    assert c.yiq is c.yiq
+    assert 0 <= c.hls[0] <= 1
+
+
 # def test_colorsys() -> None:
 #     c = Color.TRUE_WHITE
 #     assert c.hls == (0, 1, 0)
@@ -88,3 +101,27 @@ def test_repr() -> None:
     assert repr(Color.LIGHT_GRAY) == 'Color.LIGHT_GRAY'
     assert repr(Color.GRAY) == 'Color.GRAY'
     assert repr(Color.DARK_GRAY) == 'Color.DARK_GRAY'
+
+
+def test_interned() -> None:
+    assert Color.from_rgb24(0x1A1C2C) is Color.BLACK
+    assert Color._from_rgb16(Color.RED._rgb16) is Color.RED
+    c = Color.from_rgb24(0x123456)
+    assert Color.from_rgb24(0x123456) is c
+    assert copy.copy(c) is c
+    assert pickle.loads(pickle.dumps(c)) is c
+    # Out-of-range values are masked and share the color and the cache entry.
+    assert Color.from_rgb24(0x1123456) is c
+
+
+def test_from_rgb24__bounded_cache() -> None:
+    for raw in range(0, 0x1000000, 0x101):
+        Color.from_rgb24(raw)
+    info = _rgb24_to_rgb16.cache_info()
+    assert info.maxsize is not None
+    assert info.currsize <= info.maxsize
+
+
+def test_immutable() -> None:
+    with pytest.raises(AttributeError):
+        Color.RED._rgb16 = 0
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from array import array
+
+import pytest
+from firefly_test import Color, Condition, Frame
+from firefly_test._condition import CONTAINS, DIFFER, EQUAL, LACKS
+
+
+def test_pixel() -> None:
+    [check] = Condition.pixel(3, 4, Color.RED)._checks
+    assert check._raw() == (3, 4, 1, 1, [Color.RED._rgb16], EQUAL)
+
+
+def test_region() -> None:
+    frame = Frame([Color.RED, Color.BLUE, Color.GREEN, Color.RED], width=2)
+    [check] = Condition.region(10, 20, frame)._checks
+    raw = [c._rgb16 for c in (Color.RED, Color.BLUE, Color.GREEN, Color.RED)]
+    assert check._raw() == (10, 20, 2, 2, raw, EQUAL)
+
+
+def test_pattern() -> None:
+    cond = Condition.pattern("""
+        RR..B
+        .G...
+    """, x=5, y=6)
+    checks = [check._raw() for check in cond._checks]
+    red, green, blue = Color.RED._rgb16, Color.GREEN._rgb16, Color.BLUE._rgb16
+    assert checks == [
+        (5, 6, 2, 1, [red, red], EQUAL),
+        (9, 6, 1, 1, [blue], EQUAL),
+        (6, 7, 1, 1, [green], EQUAL),
+    ]
+
+
+def test_colors() -> None:
+    [check] = Condition.has_color(Color.RED, Color.BLUE)._checks
+    colors = [Color.RED._rgb16, Color.BLUE._rgb16]
+    assert check._raw() == (0, 0, 240, 160, colors, CONTAINS)
+    [check] = Condition.no_color(Color.RED, y=10, height=5)._checks
+    assert check._raw() == (0, 10, 240, 5, [Color.RED._rgb16], LACKS)
+
+
+def test_changed() -> None:
+    cond = Condition.changed(1, 1, 2, 2) & Condition.pixel(0, 0, Color.RED)
+    buf = array('H', range(240 * 160))
+    calls = []
+
+    def get_buf() -> array[int]:
+        calls.append(1)
+        return buf
+
+    changed, pixel = cond._resolve(get_buf)
+    assert calls == [1]
+    assert changed._raw() == (1, 1, 2, 2, [241, 242, 481, 482], DIFFER)
+    assert pixel._raw() == (0, 0, 1, 1, [Color.RED._rgb16], EQUAL)
+    Condition.pixel(0, 0, Color.RED)._resolve(get_buf)
+    assert calls == [1]
+
+
+def test_out_of_frame() -> None:
+    with pytest.raises(ValueError, match='out of the frame'):
+        Condition.pixel(240, 0, Color.RED)
+    with pytest.raises(ValueError, match='out of the frame'):
+        Condition.changed(200, 100, 50, 10)
+    with pytest.raises(ValueError, match='empty'):
+        Condition.changed(0, 0, 0, 10)
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+from firefly_test import ForkError, fork_map
+
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, 'fork'),
+    reason='os.fork is not supported',
+)
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.value = 0
+
+
+def add(counter: Counter, n: int) -> tuple[int, int]:
+    counter.value += n
+    return (counter.value, os.getpid())
+
+
+def test_fork_map() -> None:
+    counter = Counter()
+    counter.value = 100
+    results = fork_map(counter, range(10), add, workers=3)
+    assert [value for value, _ in results] == [100 + n for n in range(10)]
+    assert all(pid != os.getpid() for _, pid in results)
+    # Changes in workers don't affect the parent.
+    assert counter.value == 100
+
+
+def fail(counter: Counter, n: int) -> int:
+    if n == 2:
+        raise ZeroDivisionError('oh no')
+    return n
+
+
+def test_fork_map__error() -> None:
+    with pytest.raises(ForkError, match=r'(?s)branch #2.+ZeroDivisionError: oh no'):
+        fork_map(Counter(), range(4), fail)
+
+
+def _explode() -> None:
+    raise ValueError('cannot unpickle')
+
+
+class Unpicklable:
+    def __reduce__(self) -> tuple[object, tuple[()]]:
+        return (_explode, ())
+
+
+def unpicklable(counter: Counter, n: int) -> object:
+    if n == 1:
+        return Unpicklable()
+    return n
+
+
+def test_fork_map__bad_result() -> None:
+    with pytest.raises(ForkError, match=r'branch #1: cannot load the result'):
+        fork_map(Counter(), range(3), unpicklable)
+    # All workers are reaped.
+    with pytest.raises(ChildProcessError):
+        os.waitpid(-1, os.WNOHANG)
+
+
+def large(counter: Counter, n: int) -> bytes:
+    return bytes([n]) * 1_000_000
+
+
+def test_fork_map__large_results() -> None:
+    results = fork_map(Counter(), range(4), large, workers=2)
+    assert [result[:1] for result in results] == [bytes([n]) for n in range(4)]
+    assert all(len(result) == 1_000_000 for result in results)
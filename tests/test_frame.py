@@ -1,7 +1,10 @@
+import zlib
+from array import array
 from io import BytesIO
+from pathlib import Path
 
 import pytest
-from firefly_test import Color, Frame
+from firefly_test import Color, Frame, _frame, _snapshot
 
 
 def get_frame() -> Frame:
@@ -35,10 +38,18 @@ def test_at() -> None:
     assert type(f.at(6)) is Color
 
 
+def test_from_rgb16__bytes() -> None:
+    raw = array('H', [Color.RED._rgb16, Color.GREEN._rgb16] * 2).tobytes()
+    f = Frame._from_rgb16(raw, width=2)
+    assert f.height == 2
+    assert f.at(0, 1) == Color.RED
+    assert f.at(1, 1) == Color.GREEN
+
+
 def test_get_sub() -> None:
     f = get_frame()
     s = f.get_sub(x=1, height=2)
-    assert s._buf == [
+    assert list(s) == [
         0x01, 0x02, 0x03,
         0x11, 0x12, 0x13,
     ]
@@ -57,6 +68,11 @@ def test_to_dict() -> None:
     }
 
 
+def test_to_rgb24() -> None:
+    f = get_frame()
+    assert f.to_rgb24() == [int(c) for c in f]
+
+
 def test_to_set() -> None:
     given = [0x08, 0x10, 0x28, 0x10, 0x30, 0x08, 0x10, 0x18, 0x18]
     f = Frame.from_rgb24(given, width=3)
@@ -74,7 +90,7 @@ def test_to_set() -> None:
 def test_assert_match__snapshot() -> None:
     f_good = get_frame()
     f_bad = get_frame()
-    f_bad._buf[3] = Color.from_rgb24(0x66)
+    f_bad._buf[3] = Color.from_rgb24(0x66)._rgb16
     snapshot = BytesIO()
     f_good.write(snapshot)
 
@@ -94,6 +110,32 @@ def test_assert_match__pattern() -> None:
         f.assert_match('B')
 
 
+@pytest.mark.parametrize('has_numpy', [True, False])
+def test_diff(monkeypatch: pytest.MonkeyPatch, has_numpy: bool) -> None:
+    if has_numpy:
+        pytest.importorskip('numpy')
+    monkeypatch.setattr(_frame, '_HAS_NUMPY', has_numpy)
+    f1 = get_frame()
+    f2 = get_frame()
+    assert not f1.diff(f2)
+    assert f1.diff(f2).bbox is None
+
+    f2._buf[5] = Color.RED._rgb16
+    f2._buf[11] = Color.RED._rgb16
+    d = f1.diff(f2)
+    assert d
+    assert d.count == 2
+    assert d.row_counts == (0, 1, 1)
+    assert d.lines == 2
+    assert d.bbox == (1, 1, 3, 2)
+    assert d.at(1, 1)
+    assert not d.at(2, 1)
+    assert d.mask == bytes([0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1])
+
+    with pytest.raises(TypeError):
+        f1.diff(f1.get_sub(width=2, height=2))
+
+
 def test_read_write_roundtrip() -> None:
     f1 = get_frame()
     buf = BytesIO()
@@ -105,6 +147,60 @@ def test_read_write_roundtrip() -> None:
     assert f1 == f2
 
 
+@pytest.mark.parametrize('encoding', ['auto', 'raw', 'zlib', 'palette', 'rle'])
+def test_read_write_encodings(tmp_path: Path, encoding: str) -> None:
+    f1 = get_frame()
+    path = tmp_path / 'snapshot'
+    f1.write(path, encoding=encoding)  # type: ignore[arg-type]
+    assert path.read_bytes().startswith(b'FFZS\x02')
+    f2 = Frame.read(path)
+    assert f1._buf == f2._buf
+    assert f1._width == f2._width
+
+
+@pytest.mark.parametrize('encoding', ['raw', 'zlib', 'palette', 'rle'])
+def test_read_corrupted(tmp_path: Path, encoding: str) -> None:
+    path = tmp_path / 'snapshot'
+    get_frame().write(path, encoding=encoding)  # type: ignore[arg-type]
+    data = path.read_bytes()
+    path.write_bytes(data[:-5])
+    with pytest.raises(ValueError):
+        Frame.read(path)
+    if encoding != 'raw':
+        path.write_bytes(data[:20] + bytes(len(data) - 20))
+        with pytest.raises(ValueError, match='corrupted snapshot'):
+            Frame.read(path)
+
+
+def test_read_truncated_header() -> None:
+    with pytest.raises(ValueError, match='header is truncated'):
+        Frame.read(BytesIO(b'FFZS\x02\x00'))
+
+
+def test_write_auto() -> None:
+    stream = BytesIO()
+    get_frame().write(stream)
+    assert stream.getvalue()[5] == _snapshot.ENCODINGS['zlib']
+
+
+def test_read_v1() -> None:
+    f1 = get_frame()
+    raw = f1._width.to_bytes(2, 'little') + _snapshot.pack(f1._buf)
+    f2 = Frame.read(BytesIO(zlib.compress(raw)))
+    assert f1._buf == f2._buf
+    assert f1._width == f2._width
+
+
+def test_write_palette_too_many_colors() -> None:
+    f = Frame._from_rgb16(list(range(300)), width=30)
+    with pytest.raises(ValueError):
+        f.write(BytesIO(), encoding='palette')
+    stream = BytesIO()
+    f.write(stream)
+    stream.seek(0)
+    assert Frame.read(stream) == f
+
+
 def test_iter() -> None:
     buf = [91, 92, 93, 94]
     f = Frame.from_rgb24(buf, width=2)
@@ -151,7 +247,7 @@ def test_slice() -> None:
     f = get_frame()
     # https://github.com/python/typeshed/issues/8647
     s = f[(1, 0):(4, 2)]  # type: ignore[misc]
-    assert s._buf == [
+    assert list(s) == [
         0x01, 0x02, 0x03,
         0x11, 0x12, 0x13,
     ]
@@ -195,7 +291,66 @@ def test_eq() -> None:
     """
 
 
+def test_digest() -> None:
+    f1 = get_frame()
+    f2 = get_frame()
+    assert f1.digest() == f2.digest()
+    assert len(f1.digest()) == 16
+    assert len({f1, f2}) == 1
+    assert f1 == f2
+    f1.assert_match(f2)
+
+    f3 = Frame.from_rgb24([0x66] * 12, width=4)
+    assert f1.digest() != f3.digest()
+    assert f1 != f3
+    assert len({f1, f2, f3}) == 2
+    with pytest.raises(AssertionError):
+        f1.assert_match(f3)
+
+    f4 = Frame._from_rgb16(f1._buf, width=6)
+    assert f1.digest() != f4.digest()
+
+
 def test_len() -> None:
     f = get_frame()
     assert len(f) == f.width * f.height
     assert len(f) == 12
+
+
+def test_to_png() -> None:
+    f = get_frame()
+    stream = BytesIO()
+    f.to_png(stream)
+    png = stream.getvalue()
+    assert png.startswith(b'\x89PNG\r\n\x1a\n')
+    assert png.endswith(b'IEND\xaeB`\x82')
+
+
+def test_numpy_roundtrip() -> None:
+    pytest.importorskip('numpy')
+    f = get_frame()
+    raw = f.to_numpy()
+    assert raw.shape == (3, 4)
+    assert raw[2, 1] == f.at(1, 2)._rgb16
+    assert Frame.from_numpy(raw) == f
+
+    rgb = f.to_numpy(rgb=True)
+    assert rgb.shape == (3, 4, 3)
+    assert tuple(rgb[2, 1]) == (f.at(1, 2).r, f.at(1, 2).g, f.at(1, 2).b)
+    assert Frame.from_numpy(rgb) == f
+
+
+def test_without_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(_frame, '_HAS_NUMPY', False)
+    f = get_frame()
+    assert f.to_set() == set(f)
+    assert f.to_counter()[f.at(0, 0)] >= 1
+    assert 0x23 in f
+    assert 0x30 not in f
+    with pytest.raises(ImportError):
+        f.to_numpy()
+
+    f_bad = get_frame()
+    f_bad._buf[5] = Color.RED._rgb16
+    with pytest.raises(AssertionError, match='Pixels mismatch: 1 out of 12'):
+        f_bad.assert_match(f)
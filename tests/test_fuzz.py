@@ -0,0 +1,91 @@
+import random
+import signal
+import time
+from pathlib import Path
+
+from firefly_test import InputTimeline, fuzz
+from firefly_test._fuzz import _generate, _minimize, _mutate, _Outcome, _Worker
+
+
+def test_generate() -> None:
+    case = _generate(random.Random(13), 300)
+    assert len(case) == 300
+    assert list(case.changes())
+    assert _generate(random.Random(13), 300) == case
+    for _, input in case.changes():
+        assert input._buttons < 0b10000
+
+
+def test_mutate() -> None:
+    rng = random.Random(13)
+    case = _generate(rng, 300)
+    for _ in range(50):
+        mutated = _mutate(rng, case, 300)
+        assert len(mutated) == 300
+        assert mutated != case
+
+
+class FakeWorker:
+    """Fails if the input changes at update 30 and the timeline is long enough.
+    """
+
+    def __init__(self) -> None:
+        self.runs = 0
+
+    def run(self, case: InputTimeline, timeout: float) -> _Outcome:
+        self.runs += 1
+        changed = any(i == 30 for i, _ in case.changes())
+        if changed and len(case) >= 40:
+            return ('error', 'RuntimeError: oh no', 40, [])
+        return (None, '', len(case), [])
+
+
+def test_minimize() -> None:
+    case = _generate(random.Random(13), 100)
+    changes = [change for change in case._changes() if change[0] != 30]
+    changes.append((30, 7, 7, 1))
+    case = InputTimeline._from_changes(sorted(changes), len(case))
+    worker = FakeWorker()
+    result = _minimize(worker, case, 'error', 'RuntimeError: oh no', 1.0)  # type: ignore[arg-type]
+    assert len(result) == 40
+    assert [i for i, _ in result.changes()] == [30]
+    assert worker.runs < 30
+
+
+def test_fuzz__broken_app(tmp_path: Path) -> None:
+    findings = fuzz(
+        'lux.snek',
+        tmp_path / 'vfs',
+        runs=4,
+        length=20,
+        workers=2,
+        seed=13,
+        out_dir=tmp_path / 'out',
+    )
+    assert len(findings) == 1
+    [finding] = findings
+    assert finding.kind == 'error'
+    assert finding.path is not None
+    assert finding.path.parent == tmp_path / 'out'
+    text = finding.path.read_text()
+    assert text.startswith('# error\n')
+    assert InputTimeline.from_text(text) == finding.timeline
+
+
+def test_worker__crash(tmp_path: Path) -> None:
+    worker = _Worker(('lux', 'snek'), tmp_path / 'vfs', 10)
+    try:
+        case = _generate(random.Random(13), 20)
+        worker.case = case
+        worker.deadline = time.monotonic() + 5
+        worker._process.kill()
+        worker._process.join()
+        kind, message, updates, _ = worker.recv(5)
+        assert kind == 'crash'
+        assert message == f'the worker died with exit code {-signal.SIGKILL}'
+        assert updates == len(case)
+        # The worker is restarted and can run cases again.
+        kind, _, _, _ = worker.run(case, 5)
+        assert kind == 'error'
+    finally:
+        worker.close()
@@ -1,8 +1,20 @@
 """The module contains tests for sys.input-test.
 """
+import asyncio
+import pickle
 from pathlib import Path
+from typing import Tuple
 
-from firefly_test import App, Color, Input, Pad
+import pytest
+from firefly_test import (
+    App,
+    Color,
+    Condition,
+    Input,
+    InputTimeline,
+    Pad,
+    fork_map,
+)
 
 
 def test_colors() -> None:
@@ -94,3 +106,273 @@ def test_snapshots() -> None:
     input = Input(Pad(-300, -400), s=True, e=True, w=True, n=True)
     app.update(input)
     app.frame.assert_match(snapshots / 'all_pressed')
+
+
+def test_multiple_apps() -> None:
+    """Each app has its own runtime, so apps don't affect each other.
+    """
+    app1 = App('sys.input-test')
+    app2 = App('sys.input-test')
+    app1.start()
+    app2.start()
+    app1.update()
+    app2.update()
+
+    app1.update(Input(s=True))
+    assert app1.frame.at(185, 100) == Color.LIGHT_GREEN
+    assert app2.frame.at(185, 100) == Color.WHITE
+
+    app2.update()
+    assert app1.frame.at(185, 100) == Color.LIGHT_GREEN
+    assert app2.frame.at(185, 100) == Color.WHITE
+
+
+def test_async() -> None:
+    async def run(app: App) -> int:
+        frames = 0
+        await app.astart()
+        await app.aupdate(Input(s=True))
+        frame = await app.aframe()
+        assert frame.at(185, 100) == Color.LIGHT_GREEN
+        async for frame in app:
+            assert frame.at(185, 100) == Color.LIGHT_GREEN
+            frames += 1
+            if frames == 3:
+                break
+        return frames
+
+    async def main() -> list[int]:
+        apps = [App('sys.input-test') for _ in range(3)]
+        return await asyncio.gather(*(run(app) for app in apps))
+
+    assert asyncio.run(main()) == [3, 3, 3]
+
+
+def test_async__overlapping() -> None:
+    async def main() -> None:
+        app = App('sys.input-test')
+        await app.astart()
+        _, _, frame = await asyncio.gather(
+            app.aupdate(Input()),
+            app.aupdate(Input(s=True)),
+            app.aframe(),
+        )
+        assert frame.at(185, 100) == Color.LIGHT_GREEN
+
+    asyncio.run(main())
+
+
+def test_run() -> None:
+    app = App('sys.input-test')
+    app.start()
+    frames = app.run(10)
+    assert len(frames) == 1
+    assert frames[0].at(185, 100) == Color.WHITE
+
+    frames = app.run(10, inputs={3: Input(s=True), 7: Input()}, capture=1)
+    assert len(frames) == 10
+    assert frames[2].at(185, 100) == Color.WHITE
+    assert frames[3].at(185, 100) == Color.LIGHT_GREEN
+    assert frames[6].at(185, 100) == Color.LIGHT_GREEN
+    assert frames[7].at(185, 100) == Color.WHITE
+
+    frames = app.run(6, inputs=[Input(e=True), None, None], capture=3)
+    assert len(frames) == 2
+    assert frames[1].at(205, 80) == Color.LIGHT_GREEN
+    assert app.run(5, capture=0) == []
+
+
+def test_advance() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.advance(20, inputs={10: Input(s=True)})
+    assert app.frame.at(185, 100) == Color.LIGHT_GREEN
+    app.advance(5, inputs=[Input()], render=True)
+    assert app.frame.at(185, 100) == Color.WHITE
+
+
+def test_checkpoint() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.update()
+    app.update(Input(s=True))
+    app.advance(5)
+    cp = app.checkpoint()
+    assert cp.updates == 7
+    assert cp.frame.at(185, 100) == Color.LIGHT_GREEN
+
+    app.update(Input())
+    assert app.frame.at(185, 100) == Color.WHITE
+    app.restore(cp)
+    assert app.frame.at(185, 100) == Color.LIGHT_GREEN
+
+    app2 = App.from_checkpoint(pickle.loads(pickle.dumps(cp)))
+    assert app2.frame == cp.frame
+    app2.update(Input(e=True))
+    assert app2.frame.at(205, 80) == Color.LIGHT_GREEN
+
+
+def test_restore__diverged() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.update(Input(s=True))
+    cp = app.checkpoint()
+    app.update(Input())
+    cp._frame = app.frame
+    with pytest.raises(RuntimeError, match='differs'):
+        app.restore(cp)
+
+
+def test_restore__another_vfs(tmp_path: Path) -> None:
+    app = App('sys.input-test')
+    app.start()
+    cp = app.checkpoint()
+    cp._vfs_path = tmp_path
+    with pytest.raises(ValueError, match='another VFS'):
+        app.restore(cp)
+
+
+def press_and_probe(app: App, input: Input) -> bool:
+    app.update(input)
+    return app.frame.at(185, 100) == Color.LIGHT_GREEN
+
+
+def test_fork_map() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.update()
+    branches = [Input(s=True), Input(e=True), Input(s=True, n=True)]
+    assert fork_map(app, branches, press_and_probe) == [True, False, True]
+    assert app.frame.at(185, 100) == Color.WHITE
+
+
+def test_replay() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.update()
+    app.update(Input(s=True))
+    app.advance(5, inputs={2: Input(), 3: Input(e=True)})
+    expected = app.frame
+    timeline = InputTimeline.from_text(app.timeline.to_text())
+    assert len(timeline) == 7
+
+    app2 = App('sys.input-test')
+    app2.start()
+    [frame] = app2.replay(timeline, render=False)
+    assert frame == expected
+    assert frame.at(205, 80) == Color.LIGHT_GREEN
+
+
+def test_wait_until() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.update()
+    n = app.wait_until(
+        Condition.pixel(185, 100, Color.LIGHT_GREEN),
+        input=Input(s=True),
+        max_frames=10,
+    )
+    assert 0 < n <= 10
+    assert app.frame.at(185, 100) == Color.LIGHT_GREEN
+    app.wait_until(Condition.changed(180, 95, 10, 10), input=Input())
+    assert app.frame.at(185, 100) == Color.WHITE
+    with pytest.raises(TimeoutError):
+        app.wait_until(Condition.no_color(Color.WHITE), max_frames=5)
+
+
+class ExitingRunner:
+    """Wraps a Runner to make the app exit on the update satisfying the condition.
+    """
+
+    def __init__(self, runner: object) -> None:
+        self._runner = runner
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(self._runner, name)
+
+    def wait_until(self, checks: object, max_frames: int) -> Tuple[int, bool, bool]:
+        n, matched, _ = self._runner.wait_until(checks, max_frames)  # type: ignore[attr-defined]
+        return n, matched, True
+
+
+def test_wait_until__exit() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.update()
+    app._runner = ExitingRunner(app._runner)  # type: ignore[assignment]
+    n = app.wait_until(
+        Condition.pixel(185, 100, Color.LIGHT_GREEN),
+        input=Input(s=True),
+        max_frames=10,
+    )
+    assert 0 < n <= 10
+    with pytest.raises(RuntimeError, match='exited app'):
+        app.update()
+
+
+def test_pixel_and_region() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.update(Input(s=True))
+    assert app.pixel(185, 100) == Color.LIGHT_GREEN
+    assert app.pixel(185, 100) == app.frame.at(185, 100)
+    region = app.region(160, 100, 20, 5)
+    assert region.width == 20
+    assert region.height == 5
+    assert region == app.frame.get_sub(x=160, y=100, width=20, height=5)
+
+
+def test_frame_cache() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.update()
+    frame = app.frame
+    assert app.frame is frame
+    app.update(Input(s=True))
+    assert app.frame is not frame
+    assert app.frame.at(185, 100) == Color.LIGHT_GREEN
+    [last] = app.run(3)
+    assert app.frame is last
+
+
+def test_changed_regions() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.update()
+    before = app.frame
+    app.update(Input(s=True))
+    assert app.frame_changed
+    regions = app.changed_regions()
+    assert regions
+    assert any(
+        x <= 185 < x + width and y <= 100 < y + height
+        for x, y, width, height in regions
+    )
+    # Only the changed rows are copied but the frame is complete.
+    assert app.frame.at(185, 100) == Color.LIGHT_GREEN
+    assert app.frame == App.from_checkpoint(app.checkpoint()).frame
+    assert app.frame != before
+    app.update()
+    assert not app.frame_changed
+    assert app.changed_regions() == []
+
+
+def test_stats() -> None:
+    app = App('sys.input-test')
+    app.start()
+    app.enable_stats_log()
+    app.update()
+    app.update(Input(s=True))
+    app.run(3)
+    _ = app.frame
+    stats = app.stats
+    assert stats.updates == 5
+    assert 0 < stats.max_update_time <= stats.update_time
+    assert 0 <= stats.flush_time <= stats.update_time
+    assert stats.copy_time > 0
+    assert stats.guest_time > 0
+    log = app.stats_log()
+    assert [s.update for s in log] == [0, 1, 2, 3, 4]
+    assert log[1].changed_rows > 0
+    assert log[2].changed_rows == 0
+    assert app.stats_log() == []
@@ -0,0 +1,60 @@
+import pytest
+from firefly_test import Color, Frame, Pattern
+
+
+def get_frame() -> Frame:
+    buf = [
+        Color.BLACK, Color.RED, Color.GREEN,
+        Color.BLUE, Color.YELLOW, Color.WHITE,
+    ]
+    return Frame(buf, width=3)
+
+
+def test_compile_cached() -> None:
+    p = Pattern.compile('KRG')
+    assert Pattern.compile('KRG') is p
+    assert Pattern.compile('KRB') is not p
+
+
+def test_height() -> None:
+    p = Pattern("""
+        K.G
+
+        B.W
+    """)
+    assert p.height == 2
+
+
+def test_runs() -> None:
+    p = Pattern('K.GB')
+    line = p._lines[0]
+    assert line.width == 4
+    assert [(offset, list(values)) for offset, values in line.runs] == [
+        (0, [Color.BLACK._rgb16]),
+        (2, [Color.GREEN._rgb16, Color.BLUE._rgb16]),
+    ]
+
+
+def test_assert_match() -> None:
+    f = get_frame()
+    f.assert_match(Pattern('K.G'))
+    assert f == Pattern('KR')
+    assert f != Pattern('..B')
+
+
+def test_report() -> None:
+    f = get_frame()
+    with pytest.raises(AssertionError) as exc_info:
+        f.assert_match("""
+            KRG
+            BYK
+        """)
+    msg = str(exc_info.value)
+    assert 'Lines differ: 1.' in msg
+    assert 'KRG == KRG' in msg
+    assert 'BYW != BYK' in msg
+
+
+def test_unknown_symbol() -> None:
+    with pytest.raises(ValueError, match='unknown symbol'):
+        Pattern('KX')
@@ -0,0 +1,73 @@
+import struct
+import zlib
+from io import BytesIO
+
+import pytest
+from firefly_test import Color, Frame, _png
+
+
+def decode_png(data: bytes) -> tuple[int, list[int]]:
+    """Decode a PNG produced by Frame.to_png into color type and RGB24 pixels.
+    """
+    assert data.startswith(_png.SIGNATURE)
+    pos = len(_png.SIGNATURE)
+    chunks = {}
+    while pos < len(data):
+        (size,) = struct.unpack('>L', data[pos:pos + 4])
+        chunk_type = data[pos + 4:pos + 8]
+        chunks[chunk_type] = data[pos + 8:pos + 8 + size]
+        pos += 12 + size
+    width, height, _, color_type = struct.unpack('>2LBB', chunks[b'IHDR'][:10])
+    bpp = 1 if color_type == _png.INDEXED else 3
+    row_size = width * bpp
+    raw = zlib.decompress(chunks[b'IDAT'])
+    prev = bytearray(row_size)
+    pixels = bytearray()
+    for y in range(height):
+        start = y * (row_size + 1)
+        filter_type = raw[start]
+        row = bytearray(raw[start + 1:start + 1 + row_size])
+        for i in range(row_size):
+            if filter_type == _png.FILTER_SUB and i >= bpp:
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+            elif filter_type == _png.FILTER_UP:
+                row[i] = (row[i] + prev[i]) & 0xFF
+        pixels.extend(row)
+        prev = row
+    if color_type == _png.INDEXED:
+        plte = chunks[b'PLTE']
+        pixels = bytearray(b''.join(plte[i * 3:i * 3 + 3] for i in pixels))
+    rgb = [
+        int.from_bytes(pixels[i:i + 3], 'big')
+        for i in range(0, len(pixels), 3)
+    ]
+    return color_type, rgb
+
+
+def get_frame() -> Frame:
+    buf = [Color.BLACK, Color.RED, Color.GREEN, Color.BLUE] * 2
+    buf += [Color.WHITE, Color.RED, Color.GREEN, Color.BLUE]
+    return Frame(buf, width=4)
+
+
+def test_indexed() -> None:
+    f = get_frame()
+    stream = BytesIO()
+    f.to_png(stream)
+    color_type, pixels = decode_png(stream.getvalue())
+    assert color_type == _png.INDEXED
+    assert pixels == f.to_rgb24()
+
+
+@pytest.mark.parametrize('has_numpy', [True, False])
+def test_truecolor(monkeypatch: pytest.MonkeyPatch, has_numpy: bool) -> None:
+    if has_numpy:
+        pytest.importorskip('numpy')
+    monkeypatch.setattr(_png, '_HAS_NUMPY', has_numpy)
+    buf = [(i * 37) % 0x10000 for i in range(300)] + [5] * 60
+    f = Frame._from_rgb16(buf, width=30)
+    stream = BytesIO()
+    f.to_png(stream)
+    color_type, pixels = decode_png(stream.getvalue())
+    assert color_type == _png.TRUECOLOR
+    assert pixels == f.to_rgb24()
@@ -0,0 +1,93 @@
+import io
+from pathlib import Path
+
+import pytest
+from firefly_test import Input, InputTimeline, Pad
+
+
+def make_timeline() -> InputTimeline:
+    timeline = InputTimeline()
+    timeline.record()
+    timeline.record(Input(s=True))
+    timeline.record()
+    timeline.record(Input(s=True))
+    timeline.record(Input(Pad(x=-300, y=700), n=True, menu=True))
+    timeline.record(Pad(x=10, y=20))
+    return timeline
+
+
+def test_record() -> None:
+    timeline = make_timeline()
+    assert len(timeline) == 6
+    assert [i for i, _ in timeline.changes()] == [1, 4, 5]
+    assert timeline[0] is None
+    input = timeline[2]
+    assert input is not None
+    assert input._buttons == 0b1
+    input = timeline[-2]
+    assert input is not None
+    assert (input._pad._x, input._pad._y) == (-300, 700)
+    assert input._buttons == 0b11000
+    with pytest.raises(IndexError):
+        timeline[6]
+
+
+def test_bytes_roundtrip() -> None:
+    timeline = make_timeline()
+    data = timeline.to_bytes()
+    assert data[:4] == b'FFZI'
+    assert InputTimeline.from_bytes(data) == timeline
+    assert InputTimeline.from_bytes(InputTimeline().to_bytes()) == InputTimeline()
+    with pytest.raises(ValueError, match='not an input timeline'):
+        InputTimeline.from_bytes(b'hello')
+    with pytest.raises(ValueError, match='truncated'):
+        InputTimeline.from_bytes(data[:6])
+    with pytest.raises(ValueError, match='corrupted'):
+        InputTimeline.from_bytes(data[:-3])
+    with pytest.raises(ValueError, match='corrupted'):
+        InputTimeline.from_bytes(data[:12] + bytes(len(data) - 12))
+
+
+def test_read_write(tmp_path: Path) -> None:
+    timeline = make_timeline()
+    path = tmp_path / 'inputs.bin'
+    timeline.write(path)
+    assert InputTimeline.read(path) == timeline
+    stream = io.BytesIO()
+    timeline.write(stream)
+    stream.seek(0)
+    assert InputTimeline.read(stream) == timeline
+
+
+def test_text_roundtrip() -> None:
+    timeline = make_timeline()
+    text = timeline.to_text()
+    assert text == 'updates 6\n1 255 255 s\n4 -300 700 nm\n5 10 20 -\n'
+    assert InputTimeline.from_text(text) == timeline
+    commented = '# recorded session\n\n' + text
+    assert InputTimeline.from_text(commented) == timeline
+    with pytest.raises(ValueError, match='unknown button'):
+        InputTimeline.from_text('updates 3\n1 0 0 x\n')
+    with pytest.raises(ValueError, match='out of the timeline'):
+        InputTimeline.from_text('updates 3\n3 0 0 s\n')
+    with pytest.raises(ValueError, match='out of the timeline'):
+        InputTimeline.from_text('updates 3\n-1 0 0 s\n')
+    with pytest.raises(ValueError, match='not sorted'):
+        InputTimeline.from_text('updates 3\n2 0 0 s\n1 0 0 e\n')
+    with pytest.raises(ValueError, match='out of range'):
+        InputTimeline.from_text('updates 3\n1 5000 0 s\n')
+    with pytest.raises(ValueError, match='out of range'):
+        InputTimeline.from_text('updates 3\n1 0 -40000 s\n')
+    no_pad = InputTimeline.from_text('updates 3\n1 255 255 s\n')
+    assert no_pad[1] is not None
+
+
+def test_slice() -> None:
+    timeline = make_timeline()
+    assert timeline[:] == timeline
+    part = timeline[2:5]
+    assert len(part) == 3
+    assert part.to_text() == 'updates 3\n0 255 255 s\n2 -300 700 nm\n'
+    assert len(timeline[0:1]) == 1
+    assert list(timeline[0:1].changes()) == []
+    assert len(timeline[4:2]) == 0